@@ -1,10 +1,12 @@
+import asyncio
 import base64
 import json
 from decimal import Decimal
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from src.db.dynamo_handler import DynamoHandler
 from src.services.songs_cache import SongsCacheExporter
+from src.utils import json_codec
 
 
 def _json_default(value: Any) -> Any:
@@ -22,7 +24,7 @@ def _http_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "statusCode": status_code,
         "headers": JSON_HEADERS,
-        "body": json.dumps(body, default=_json_default),
+        "body": json_codec.dumps(body, default=_json_default).decode("utf-8"),
     }
 
 
@@ -80,15 +82,41 @@ def _update_inserted_by(body: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _run_sync() -> Dict[str, Any]:
+TIDAL_USERS = ("Unai", "June")
+
+# Clientes autenticados reutilizados entre invocaciones con la Lambda "caliente"
+_TIDAL_CLIENTS: Dict[str, Any] = {}
+
+
+async def _is_alive(client: Any) -> bool:
+    if client is None:
+        return False
+    return await asyncio.to_thread(client.is_authenticated)
+
+
+async def _authenticated_tidal_clients() -> List[Any]:
+    from src.db.blob_handler import BlobHandler
     from src.services.tidal_client import TidalUserClient
+
+    alive = await asyncio.gather(*(_is_alive(_TIDAL_CLIENTS.get(u)) for u in TIDAL_USERS))
+    stale = [user_name for user_name, ok in zip(TIDAL_USERS, alive) if not ok]
+    if stale:
+        tokens = await asyncio.to_thread(BlobHandler().get_tidal_tokens_many, stale)
+        clients = [
+            TidalUserClient(user_name=user_name, token_data=tokens[user_name])
+            for user_name in stale
+        ]
+        await asyncio.gather(*(client.authenticate_async() for client in clients))
+        for client in clients:
+            _TIDAL_CLIENTS[client.user_name] = client
+    return [_TIDAL_CLIENTS[user_name] for user_name in TIDAL_USERS]
+
+
+async def _run_sync() -> Dict[str, Any]:
     from src.services.tidal_library import TidalLibrary
     from src.services.tidal_playlist_sync import TidalPlaylistsSynchronizer
 
-    tidal_unai = TidalUserClient(user_name="Unai")
-    tidal_unai.authenticate()
-    tidal_june = TidalUserClient(user_name="June")
-    tidal_june.authenticate()
+    tidal_unai, tidal_june = await _authenticated_tidal_clients()
 
     tidal_lib_unai = TidalLibrary(tidal_unai)
     tidal_lib_june = TidalLibrary(tidal_june)
@@ -101,14 +129,13 @@ def _run_sync() -> Dict[str, Any]:
         ask_per_playlist=False,
         dynamo_handler=dynamo,
     )
-    sync.run()
+    await sync.run_async()
 
     count = _export_songs()
     return {"ok": True, "action": "sync", "count": count}
 
 
-def _delete_track(body: Dict[str, Any]) -> Dict[str, Any]:
-    from src.services.tidal_client import TidalUserClient
+async def _delete_track(body: Dict[str, Any]) -> Dict[str, Any]:
     from src.services.tidal_library import TidalLibrary
     from src.services.playlist_track_delete import PlaylistTrackDeleter
 
@@ -116,10 +143,7 @@ def _delete_track(body: Dict[str, Any]) -> Dict[str, Any]:
     if not song_id:
         raise ValueError("Falta songId")
 
-    tidal_unai = TidalUserClient(user_name="Unai")
-    tidal_unai.authenticate()
-    tidal_june = TidalUserClient(user_name="June")
-    tidal_june.authenticate()
+    tidal_unai, tidal_june = await _authenticated_tidal_clients()
 
     deleter = PlaylistTrackDeleter(
         tidal_a=TidalLibrary(tidal_unai),
@@ -135,14 +159,14 @@ def _delete_track(body: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _handle_post(event: Dict[str, Any]) -> Dict[str, Any]:
+async def _handle_post(event: Dict[str, Any]) -> Dict[str, Any]:
     body = _parse_event_body(event)
     action = body.get("action", "sync")
     if action == "update_inserted_by":
         return _update_inserted_by(body)
     if action == "delete_track":
-        return _delete_track(body)
-    return _run_sync()
+        return await _delete_track(body)
+    return await _run_sync()
 
 
 def lambda_handler(event, context):
@@ -156,7 +180,7 @@ def lambda_handler(event, context):
 
     if method == "POST":
         try:
-            return _http_response(200, _handle_post(event or {}))
+            return _http_response(200, asyncio.run(_handle_post(event or {})))
         except Exception as e:
             return _http_response(500, {"ok": False, "error": str(e)})
 
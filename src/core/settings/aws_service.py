@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,5 +13,6 @@ class AWSSettings(BaseSettings):
     dynamodb_table_name: str = "PlaylistSongs"
 
 
+@lru_cache(maxsize=1)
 def get_aws_settings():
     return AWSSettings()
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,5 +10,6 @@ class SpotifySettings(BaseSettings):
     key: str  = ""
 
 
+@lru_cache(maxsize=1)
 def get_spotify_settings():
     return SpotifySettings()
\ No newline at end of file
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,5 +9,6 @@ class TidalSyncSettings(BaseSettings):
     playlist_name: str = ""
 
 
+@lru_cache(maxsize=1)
 def get_tidal_sync_settings():
     return TidalSyncSettings()
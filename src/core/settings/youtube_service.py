@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,5 +11,6 @@ class YoutubeSettings(BaseSettings):
     key: str  = ""
 
 
+@lru_cache(maxsize=1)
 def get_youtube_settings():
     return YoutubeSettings()
\ No newline at end of file
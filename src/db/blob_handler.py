@@ -1,13 +1,38 @@
-import json
 import os
+import time
 import boto3
-from typing import Any
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Tuple
 
 
 from src.core.settings.aws_service import get_aws_settings
+from src.utils import json_codec
 
 
-aws_settings = get_aws_settings()
+_TIDAL_TOKEN_KEY = "tokens/tidal/tidal_token_{}.json"
+
+# Caché en memoria del proceso: user_name -> (timestamp, token_dict)
+_TOKEN_CACHE_TTL = 60.0
+_token_cache: Dict[str, Tuple[float, dict]] = {}
+
+# Pool amplio para reutilizar conexiones HTTPS en lecturas concurrentes de tokens
+_S3_CONFIG = Config(
+    max_pool_connections=50,
+    retries={"max_attempts": 3, "mode": "standard"},
+)
+
+
+@lru_cache(maxsize=1)
+def _get_s3_client():
+    """Cliente S3 compartido por proceso (boto3 clients son thread-safe)."""
+    profile = get_aws_settings().profile
+    if profile:
+        session = boto3.Session(profile_name=profile)
+    else:
+        session = boto3.Session()  # en Lambda usará el role automáticamente
+    return session.client("s3", config=_S3_CONFIG)
 
 
 
@@ -16,33 +41,35 @@ class BlobHandler():
     s3 : Any
 
     def __init__(self):
-        profile = aws_settings.profile  
-        if profile:
-            session = boto3.Session(profile_name=profile)
-        else:
-            session = boto3.Session()  # en Lambda usará el role automáticamente
-        self.s3 = session.client("s3")
-        self.bucket_name = aws_settings.bucket_name
+        self.s3 = _get_s3_client()
+        self.bucket_name = get_aws_settings().bucket_name
 
     def get_tidal_tokens(self, user_name : str) -> dict:
-        orig_path = f"tokens/tidal/tidal_token_{user_name}.json"
-        try:
-            response = self.s3.get_object(Bucket=self.bucket_name, Key=orig_path)
-            body = response["Body"].read()
-            return json.loads(body)
-        except Exception as e:
-            raise e
-            raise ValueError(f"El nombre de usuario no es el correcto")
-        
+        cached = _token_cache.get(user_name)
+        if cached and time.monotonic() - cached[0] < _TOKEN_CACHE_TTL:
+            return cached[1]
+        response = self.s3.get_object(Bucket=self.bucket_name, Key=_TIDAL_TOKEN_KEY.format(user_name))
+        token_dict = json_codec.loads(response["Body"].read())
+        _token_cache[user_name] = (time.monotonic(), token_dict)
+        return token_dict
+
+    def get_tidal_tokens_many(self, user_names: Iterable[str]) -> Dict[str, dict]:
+        """Descarga en paralelo los tokens de varios usuarios (mismo cliente S3)."""
+        user_names = list(user_names)
+        if not user_names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(user_names), 16)) as ex:
+            return dict(zip(user_names, ex.map(self.get_tidal_tokens, user_names)))
 
     def put_tidal_token_dict(self, user_name : str, token_dict: dict):
         try: 
             self.s3.put_object(
                 Bucket=self.bucket_name,
-                Key=f"tokens/tidal/tidal_token_{user_name}.json",
-                Body=json.dumps(token_dict).encode("utf-8"),
+                Key=_TIDAL_TOKEN_KEY.format(user_name),
+                Body=json_codec.dumps(token_dict),
                 ContentType="application/json"
             )
+            _token_cache[user_name] = (time.monotonic(), token_dict)
         except:
             raise Exception(f"Ha ocurrido un error guardando token de {user_name}")
 
@@ -7,14 +7,13 @@ from botocore.exceptions import ClientError
 
 from src.core.settings.aws_service import get_aws_settings
 
-aws_settings = get_aws_settings()
-
 
 class DynamoHandler:
     dynamodb: Any
     table: Any
 
     def __init__(self):
+        aws_settings = get_aws_settings()
         profile = aws_settings.profile
         session_kwargs: Dict[str, Any] = {"region_name": aws_settings.region}
         if profile:
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from src.services.spotify_getter import SpotifyUserClient
 from src.services.spotify_library import SpotifyLibrary
 from src.services.music_migrator_tidal import SpotifyToTidalMigrator
@@ -6,14 +8,13 @@ from src.services.music_migrator_tidal import SpotifyToTidalMigrator
 
 from src.core.settings.spotify_service import get_spotify_settings
 
-spotify_settings = get_spotify_settings()
-
 
 
 
 
 if __name__ == "__main__":
-        
+    spotify_settings = get_spotify_settings()
+
     client = SpotifyUserClient(
             client_id=spotify_settings.client_id,
             redirect_uri="http://127.0.0.1:8080/callback",  # o el que tengas en el Dashboard
@@ -22,7 +23,7 @@ if __name__ == "__main__":
         )
     client.authenticate()
 
-    spotify_lib = SpotifyLibrary(client)
+    spotify_lib = SpotifyLibrary(client, tracks_cache_path=Path("blob/playlist_tracks.sqlite"))
 
 
 
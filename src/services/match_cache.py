@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.utils import json_codec
+
+MatchKey = Tuple[str, str, int]
+MatchResult = Tuple[Optional[int], int, Optional[Dict[str, Any]]]
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _norm(s: Optional[str]) -> str:
+    if not s:
+        return ""
+    return _WS_RE.sub(" ", s.lower()).strip()
+
+
+def match_key(track: str, artist: Optional[str], limit: int) -> MatchKey:
+    """
+    Clave normalizada (minúsculas, espacios colapsados) de la consulta ya
+    limpia que se envía a TIDAL: no quita nada más, para que dos búsquedas
+    distintas (p.ej. "Song" y "Song [Live]") no compartan resultado.
+    """
+    return _norm(track), _norm(artist), int(limit)
+
+
+class MatchCache:
+    """
+    Caché de resoluciones Spotify → TIDAL: (track, artist, limit) -> (tid, score, info).
+
+    - En memoria: LRU de `maxsize` entradas (por proceso).
+    - En disco (opcional): sqlite en `path`, para reanudar migraciones sin
+      volver a buscar en TIDAL.
+
+    Los fallos (tid None) no se guardan: así se reintentan en la próxima
+    búsqueda en vez de quedar fijados por un error transitorio.
+
+    Es seguro usarla desde varios hilos (la migración no interactiva corre
+    en `asyncio.to_thread`).
+    """
+
+    def __init__(self, path: Optional[Path] = None, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._mem: "OrderedDict[MatchKey, MatchResult]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            # v2: las claves ya no quitan paréntesis/corchetes; las filas de
+            # la tabla anterior podrían mezclar búsquedas distintas
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS matches_v2 ("
+                " key TEXT PRIMARY KEY, tid INTEGER, score INTEGER, info_json TEXT, ts REAL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _db_key(key: MatchKey) -> str:
+        return f"{key[0]}\x1f{key[1]}\x1f{key[2]}"
+
+    def get(self, key: MatchKey) -> Optional[MatchResult]:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+                return hit
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT tid, score, info_json FROM matches_v2 WHERE key = ?", (self._db_key(key),)
+            ).fetchone()
+            if row is None:
+                return None
+            tid, score, info_json = row
+            result: MatchResult = (tid, int(score), json_codec.loads(info_json) if info_json else None)
+            self._remember(key, result)
+            return result
+
+    def put(self, key: MatchKey, result: MatchResult) -> None:
+        self.put_many([(key, result)])
+
+    def put_many(self, items: Iterable[Tuple[MatchKey, MatchResult]]) -> None:
+        """Guarda varios resultados (un único commit en sqlite); ignora los fallos."""
+        hits = [(key, result) for key, result in items if result[0] is not None]
+        now = time.time()
+        rows = [
+            (
+                self._db_key(key),
+                tid,
+                int(score),
+                json_codec.dumps(info).decode("utf-8") if info is not None else None,
+                now,
+            )
+            for key, (tid, score, info) in hits
+        ]
+        with self._lock:
+            for key, result in hits:
+                self._remember(key, result)
+            if self._db is None or not rows:
+                return
+            self._db.executemany(
+                "INSERT OR REPLACE INTO matches_v2 (key, tid, score, info_json, ts) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+
+    def _remember(self, key: MatchKey, result: MatchResult) -> None:
+        self._mem[key] = result
+        self._mem.move_to_end(key)
+        if len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 from pathlib import Path
 from datetime import datetime
 
-from .tidal_library import TidalLibrary
+from .tidal_library import TidalLibrary, normalize_playlist_title
 from .spotify_library import SpotifyLibrary
-import os
-import imghdr
+from .match_cache import MatchCache, MatchKey, MatchResult, match_key
+from uuid import uuid4
 
 # Se asume que ya tienes implementadas estas capas:
 # - SpotifyLibrary: lee playlists y pistas desde Spotify
@@ -18,10 +20,15 @@ import imghdr
 # Interfaces mínimas esperadas:
 #   SpotifyLibrary.get_my_playlists() -> List[{"id", "name", "tracks_total"}]
 #   SpotifyLibrary.get_playlist_tracks(playlist_id) -> List[{"name", "artists":[{"name"}]}]
-#   TidalLibrary.get_or_create_playlist(title, description="") -> {"id","title",...}
+#   SpotifyLibrary.iter_playlists_with_tracks(max_concurrency=..., skip=...) -> async (playlist, task | None)
+#   TidalLibrary.find_playlist(title) -> playlist | None
+#   TidalLibrary.list_playlist_titles() -> set de títulos normalizados
+#   TidalLibrary.create_playlist(title, description="") -> playlist
+#   TidalLibrary.iter_best_matches([(track, artist), ...], limit=..., max_workers=...)
+#       -> iterador de (tid, score, info) en el mismo orden
 #   TidalLibrary.find_best_match_with_score(track, artist, limit=...) -> (tid, score, info)
 #       con info={"id","title","artists"}
-#   TidalLibrary.add_tracks_by_ids(playlist_id, track_ids: Iterable[int], avoid_duplicates=True)
+#   TidalLibrary.add_tracks_by_ids(pl, track_ids: Iterable[int], avoid_duplicates=True)
 #   TidalLibrary.search_tracks_with_scores(track=..., artist=..., limit=..., offset=...) -> lista items con "_score"
 #
 # Si tus firmas varían, ajusta los nombres en el migrador.
@@ -34,32 +41,47 @@ import imghdr
 # - https://tidal.com/browse/track/12345678
 # - https://listen.tidal.com/track/12345678
 # - https://open.tidal.com/track/12345678
+# o directamente el ID numérico (grupo 2).
 
 _TIDAL_TRACK_URL_RE = re.compile(
-    r"(?:https?://)?(?:www\.)?(?:listen\.|open\.)?tidal\.com/(?:browse/)?track/(\d+)",
+    r"(?:https?://)?(?:www\.)?(?:listen\.|open\.)?tidal\.com/(?:browse/)?track/(\d+)|^(\d+)$",
     re.IGNORECASE,
 )
 
+# Limpieza de títulos de Spotify: "(Remastered 2011)", "--Live--", ...
+_CLEAN_TITLE_RE = re.compile(r"\([^()]*\)|--.*?--")
+
 PASAR_CANCIONES = "a"
 
+_IMAGE_EXT_BY_CTYPE = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+
+
+def _sniff_image_ext(head: bytes) -> str:
+    """Extensión a partir de los primeros bytes de la imagen (por defecto jpg)."""
+    if head.startswith(b"\x89PNG"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"GIF8"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return "jpg"
+
+
 def extract_tidal_track_id(value: str) -> Optional[int]:
     """Obtiene el track_id a partir de una URL de TIDAL o de una cadena numérica."""
     if not value:
         return None
-    s = value.strip()
-    m = _TIDAL_TRACK_URL_RE.search(s)
-    if m:
-        try:
-            return int(m.group(1))
-        except Exception:
-            return None
-    # ¿Es un número plano?
-    if s.isdigit():
-        try:
-            return int(s)
-        except Exception:
-            return None
-    return None
+    m = _TIDAL_TRACK_URL_RE.search(value.strip())
+    if not m:
+        return None
+    return int(m.group(1) or m.group(2))
 
 
 def prompt(msg: str, default: Optional[str] = None) -> str:
@@ -79,7 +101,7 @@ def prompt_yn(msg: str, default_yes: bool = True) -> bool:
 # ----------------------------
 # Datos de plan de migración
 # ----------------------------
-@dataclass
+@dataclass(slots=True)
 class PlannedItem:
     track: str
     artist: Optional[str]
@@ -89,6 +111,61 @@ class PlannedItem:
     artists: Optional[str]  # texto plano "Artista1, Artista2"
 
 
+class _IdBuffer:
+    """Acumula track IDs y los envía en lotes de `size` a `flush_fn`."""
+
+    def __init__(self, flush_fn: Callable[[List[int]], None], size: int = 50) -> None:
+        self._flush_fn = flush_fn
+        self._size = size
+        self._ids: List[int] = []
+
+    def add(self, track_id: int) -> None:
+        self._ids.append(track_id)
+        if len(self._ids) >= self._size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._ids:
+            ids, self._ids = self._ids, []
+            self._flush_fn(ids)
+
+
+class _SkipLog:
+    """
+    .txt de pistas omitidas manualmente (acción 's' u otra no reconocida).
+    Formato: <playlist_name> | <base>. El fichero solo se abre con la primera
+    entrada (una vez por migración), con buffer de línea para no perder
+    entradas si el proceso se corta.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._fh: Optional[TextIO] = None
+        self._failed = False
+
+    def write(self, playlist_name: str, base: str) -> None:
+        if self._fh is None:
+            if self._failed:
+                return
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = self._path.open("a", encoding="utf-8", buffering=1)
+            except Exception as e:
+                self._failed = True
+                print(f"(aviso) No se pudo abrir el log de omitidos: {e}")
+                return
+        try:
+            self._fh.write(f"{playlist_name} | {base}\n")
+        except Exception as e:
+            # No interrumpir el flujo por un fallo de escritura
+            print(f"(aviso) No se pudo escribir el log de omitidos: {e}")
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
 # ----------------------------
 # Clase principal de migración
 # ----------------------------
@@ -115,10 +192,16 @@ class SpotifyToTidalMigrator:
       - per_query_limit: int candidatos por búsqueda (por defecto 5)
       - ask_per_playlist: bool (pregunta por playlist; por defecto True)
       - avoid_duplicates: bool (evita duplicados en destino; por defecto True)
+      - max_concurrency: int búsquedas simultáneas en TIDAL al resolver (por defecto 10)
+      - match_cache_path: ruta sqlite opcional para persistir las resoluciones
+        (p.ej. blob/match_cache.sqlite); sin ella la caché es solo en memoria
     """
     tidal : TidalLibrary
     spot : SpotifyLibrary
 
+    ADD_BATCH_SIZE = 50  # IDs por llamada de inserción en TIDAL
+    SKIPPED_LOG_PATH = Path("blob", "skipped_tracks.txt")
+
     def __init__(
         self,
         spotify_lib,          # SpotifyLibrary
@@ -128,6 +211,8 @@ class SpotifyToTidalMigrator:
         per_query_limit: int = 5,
         ask_per_playlist: bool = True,
         avoid_duplicates: bool = True,
+        max_concurrency: int = 10,
+        match_cache_path: Optional[Path] = None,
     ) -> None:
         self.spot = spotify_lib
         self.tidal = tidal_lib
@@ -135,11 +220,19 @@ class SpotifyToTidalMigrator:
         self.per_query_limit = per_query_limit
         self.ask_per_playlist = ask_per_playlist
         self.avoid_duplicates = avoid_duplicates
+        self.max_concurrency = max_concurrency
+        self._match_cache = MatchCache(match_cache_path)
 
     # ------------------------
     # Entrypoint interactivo
     # ------------------------
     def run(self) -> None:
+        if not self.ask_per_playlist:
+            # Modo no interactivo: las pistas se descargan en paralelo y solapadas
+            # con el propio listado de playlists y con la migración
+            asyncio.run(self._migrate_all())
+            return
+
         playlists = self.spot.get_my_playlists()
         if not playlists:
             print("No se encontraron playlists en Spotify.")
@@ -149,12 +242,56 @@ class SpotifyToTidalMigrator:
             name = p.get("name")
             pid = p.get("id")
             count = p.get("tracks_total")
-            if self.ask_per_playlist:
-                ok = prompt_yn(f"¿Migrar la playlist '{name}' ({count} pistas)?", default_yes=True)
-                if not ok:
-                    continue
-            self.migrate_playlist(playlist_id=pid, playlist_name=name)
+            ok = prompt_yn(f"¿Migrar la playlist '{name}' ({count} pistas)?", default_yes=True)
+            if not ok:
+                continue
+            self.migrate_playlist(playlist_id=pid, playlist_name=name, snapshot_id=p.get("snapshot_id"))
 
+    async def _migrate_all(self) -> None:
+        """
+        Migra todas las playlists sin preguntar, según se van listando. Las
+        pistas de las siguientes `max_concurrency` playlists se descargan en
+        segundo plano mientras se migra la actual; las que ya existen en TIDAL
+        (y se van a saltar) ni se descargan. Un fallo al descargar una
+        playlist solo omite esa playlist.
+        """
+        existing = self.tidal.list_playlist_titles() if PASAR_CANCIONES == "a" else set()
+        # Ventana acotada: como mucho max_concurrency playlists por delante
+        ahead: Deque[Tuple[Dict[str, Any], Optional["asyncio.Task[List[Dict[str, Any]]]"]]] = deque()
+        count = 0
+        async for entry in self.spot.iter_playlists_with_tracks(
+            max_concurrency=self.max_concurrency,
+            skip=lambda row: normalize_playlist_title(row.get("name")) in existing,
+        ):
+            ahead.append(entry)
+            count += 1
+            if len(ahead) > self.max_concurrency:
+                await self._migrate_entry(*ahead.popleft())
+        while ahead:
+            await self._migrate_entry(*ahead.popleft())
+
+        if not count:
+            print("No se encontraron playlists en Spotify.")
+        else:
+            print(f"\nProcesadas {count} playlists de Spotify.")
+
+    async def _migrate_entry(
+        self, p: Dict[str, Any], task: Optional["asyncio.Task[List[Dict[str, Any]]]"]
+    ) -> None:
+        name = p.get("name")
+        if task is None:
+            print(f"\n==== Migrando: {name} ====")
+            print(f"La playlist {name} ya existe en TIDAL; se omite.")
+            return
+        try:
+            tracks = await task
+        except Exception as e:
+            print(f"\n(aviso) No se pudieron descargar las pistas de '{name}': {e}")
+            return
+        # En un hilo: el bucle sigue atendiendo las descargas en segundo plano
+        await asyncio.to_thread(
+            self.migrate_playlist, playlist_id=p.get("id"), playlist_name=name, tracks=tracks
+        )
 
     def _copy_playlist_image(self, *, playlist_name : str,  spotify_playlist_id: str, tidal_playlist_obj) -> None:
         """
@@ -166,33 +303,31 @@ class SpotifyToTidalMigrator:
             if not url:
                 print("  (Sin portada en Spotify o no disponible)")
                 return
-            data = self.spot.download_bytes_from_url(url)
-            # Detectar extensión
-            kind = imghdr.what(None, h=data)  # 'jpeg', 'png', 'gif', 'webp', ...
-            ext_map = {"jpeg": "jpg", "png": "png", "gif": "gif", "webp": "webp"}
-            ext = ext_map.get(kind, "jpg")  # por defecto jpg
-
             # Asegurar carpeta destino
-            out_dir = os.path.join(".", "blob")
-            os.makedirs(out_dir, exist_ok=True)
-
-            # Nombre de archivo: <playlist_id>.<ext>
-            filename = f"{playlist_name.replace("/", "-")}.{ext}"
-            out_path = os.path.join(out_dir, filename)
-
-            # Si existe, no machacar sin querer: añade sufijo incremental
-            if os.path.exists(out_path):
-                base, _ = os.path.splitext(filename)
-                n = 2
-                while True:
-                    candidate = os.path.join(out_dir, f"{base}_{n}.{ext}")
-                    if not os.path.exists(candidate):
-                        out_path = candidate
-                        break
-                    n += 1
-
-            with open(out_path, "wb") as f:
-                f.write(data)
+            out_dir = Path("blob")
+            out_dir.mkdir(parents=True, exist_ok=True)
+
+            # Se descarga por bloques a un temporal; la extensión se decide después
+            tmp_path = out_dir / f".{uuid4().hex}.part"
+            ok, ctype = self.spot.download_to_path(url, tmp_path, return_type=True)
+            if not ok:
+                print("  (No se pudo descargar la portada)")
+                return None
+            # Extensión según Content-Type; si no viene, por los bytes mágicos
+            ext = _IMAGE_EXT_BY_CTYPE.get((ctype or "").split(";")[0].strip().lower())
+            if ext is None:
+                with open(tmp_path, "rb") as f:
+                    ext = _sniff_image_ext(f.read(12))
+
+            # Nombre de archivo: <playlist_name>.<ext>
+            safe_name = playlist_name.replace("/", "-")
+            out_path = out_dir / f"{safe_name}.{ext}"
+
+            # Si existe, no machacar sin querer: añade sufijo aleatorio
+            if out_path.exists():
+                out_path = out_dir / f"{safe_name}_{uuid4().hex[:6]}.{ext}"
+
+            tmp_path.replace(out_path)
 
             print(f"  Portada guardada en: {out_path}")
             return out_path
@@ -206,12 +341,17 @@ class SpotifyToTidalMigrator:
     # ------------------------
     # Migrar una playlist
     # ------------------------
-    def migrate_playlist(self, playlist_id: str, playlist_name: str) -> None:
+    def migrate_playlist(
+        self,
+        playlist_id: str,
+        playlist_name: str,
+        tracks: Optional[List[Dict[str, Any]]] = None,
+        snapshot_id: Optional[str] = None,
+    ) -> None:
         print(f"\n==== Migrando: {playlist_name} ====")
-        pl_exit = self.tidal.check_playlist(
-            title=playlist_name, description="Migrated from Spotify"
-        )
-        if pl_exit:
+        # Una sola consulta: sirve para avisar si ya existe y como destino
+        dest_pl = self.tidal.find_playlist(playlist_name)
+        if dest_pl is not None:
             print(f"La playlist {playlist_name} ya existe. Elige la siguente accion")
             if PASAR_CANCIONES == "a":
                 return None
@@ -221,109 +361,100 @@ class SpotifyToTidalMigrator:
                 ).lower()
             if action == "s":
                 return None
-        tracks = self.spot.get_playlist_tracks(playlist_id)
+        if tracks is None:
+            tracks = self.spot.get_playlist_tracks(playlist_id, snapshot_id=snapshot_id)
         if not tracks:
             print("(vacía)\n")
             return
         print(f"Pistas a resolver: {len(tracks)}")
 
-        # 1) Resolver candidatos con score contra TIDAL
-        plan: List[PlannedItem] = []
-        for t in tracks:
-            name = (t.get("name") or "").strip()
-            name = re.sub(r"\([^()]*\)|--.*?--", "", name)
-            artists = t.get("artists") or []
-            artist = (artists[0] or {}).get("name") if artists else None
-            tid, score, info = self.tidal.find_best_match_with_score(
-                track=name, artist=artist, limit=self.per_query_limit
-            )
-            title = (info or {}).get("title")
-            artists_txt = (info or {}).get("artists")
-            plan.append(
-                PlannedItem(
-                    track=name, artist=artist, tidal_id=tid, score=score, title=title, artists=artists_txt
-                )
-            )
-
-        # 2) Crear/obtener playlist destino en TIDAL
-        dest_pl = self.tidal.get_or_create_playlist(
-            title=playlist_name, description="Migrated from Spotify"
-        )
+        # 1) Crear/obtener playlist destino en TIDAL
+        if dest_pl is None:
+            dest_pl = self.tidal.create_playlist(playlist_name, "Migrated from Spotify")
         self._copy_playlist_image(playlist_name=playlist_name , spotify_playlist_id=playlist_id, tidal_playlist_obj=dest_pl)
-        # 3) Añadir elementos, pidiendo confirmación en low-score
+        # 2) Resolver candidatos con score contra TIDAL e ir añadiendo los de
+        #    alta confianza mientras siguen las búsquedas; luego los low-score
         inserted = 0
         pending_manual_ids: List[int] = []
 
-        for i, item in enumerate(plan, 1):
-            base = f"{item.track} — {item.artist or ''}".strip()
-
-            # Alta confianza: añadir directamente
-            if item.tidal_id and item.score >= self.score_threshold:
-                print(f"{i:>3}. ✅ {base} | {item.title} — {item.artists} [{item.score}]")
-                self.tidal.add_tracks_by_ids(
-                    pl=dest_pl, track_ids=[item.tidal_id], avoid_duplicates=self.avoid_duplicates
-                )
-                inserted += 1
-                continue
-
-            # Baja confianza o sin resultado → interacción
-            sug = f"{item.title or '—'} — {item.artists or '—'}"
-            print(f"{i:>3}. ❓ {base} | Sugerencia: {sug} | score={item.score}")
-            if not PASAR_CANCIONES:
-                action = prompt(
-                    "Acción (A=añadir sugerida, U=URL/ID TIDAL manual, L=listar opciones, S=salta)",
-                    "A" if item.tidal_id else "U",
-                ).lower()
-            else :
-                action = PASAR_CANCIONES
-
-            if action == "a" and item.tidal_id:
-                self.tidal.add_tracks_by_ids(
-                    pl=dest_pl, track_ids=[item.tidal_id], avoid_duplicates=self.avoid_duplicates
-                )
-                inserted += 1
-                continue
-
-            if action == "u":
-                manual = prompt("Pega URL/ID de pista de TIDAL (o Enter para omitir)", "").strip()
-                tid_manual = extract_tidal_track_id(manual)
-                if not tid_manual:
-                    print("  → Entrada inválida; omitido.")
+        buffer = _IdBuffer(
+            lambda ids: self.tidal.add_tracks_by_ids(
+                pl=dest_pl, track_ids=ids, avoid_duplicates=self.avoid_duplicates
+            ),
+            self.ADD_BATCH_SIZE,
+        )
+        skip_log = _SkipLog(self.SKIPPED_LOG_PATH)
+        try:
+            review: List[Tuple[int, PlannedItem]] = []
+            for i, item in enumerate(self._iter_plan(tracks), 1):
+                # Alta confianza: añadir directamente
+                if item.tidal_id and item.score >= self.score_threshold:
+                    base = f"{item.track} — {item.artist or ''}".strip()
+                    print(f"{i:>3}. ✅ {base} | {item.title} — {item.artists} [{item.score}]")
+                    buffer.add(item.tidal_id)
+                    inserted += 1
+                else:
+                    review.append((i, item))
+
+            for i, item in review:
+                base = f"{item.track} — {item.artist or ''}".strip()
+
+                # Baja confianza o sin resultado → interacción
+                sug = f"{item.title or '—'} — {item.artists or '—'}"
+                print(f"{i:>3}. ❓ {base} | Sugerencia: {sug} | score={item.score}")
+                if not PASAR_CANCIONES:
+                    action = prompt(
+                        "Acción (A=añadir sugerida, U=URL/ID TIDAL manual, L=listar opciones, S=salta)",
+                        "A" if item.tidal_id else "U",
+                    ).lower()
+                else :
+                    action = PASAR_CANCIONES
+
+                if action == "a" and item.tidal_id:
+                    buffer.add(item.tidal_id)
+                    inserted += 1
                     continue
-                pending_manual_ids.append(tid_manual)
-                # Añadimos en lote al final por eficiencia/duplicados
-                continue
 
-            if action == "l":
-                # Listar alternativas usando la búsqueda con scores
-                opts = self._preview_search_tidal(track=item.track, artist=item.artist, limit=self.per_query_limit)
-                if not opts:
-                    print("  → sin alternativas; omitido.")
+                if action == "u":
+                    manual = prompt("Pega URL/ID de pista de TIDAL (o Enter para omitir)", "").strip()
+                    tid_manual = extract_tidal_track_id(manual)
+                    if not tid_manual:
+                        print("  → Entrada inválida; omitido.")
+                        continue
+                    pending_manual_ids.append(tid_manual)
+                    # Añadimos en lote al final por eficiencia/duplicados
                     continue
-                for j, o in enumerate(opts, 1):
-                    print(f"    {j}. {o['title']} — {o['artists']} [score={o['_score']}] (id={o['id']})")
-                pick = prompt("Elige índice o Enter para omitir", "").strip()
-                if not pick:
-                    continue
-                try:
-                    idx = int(pick) - 1
-                    chosen = opts[idx]
-                    vid = chosen.get("id")
-                    if vid:
-                        self.tidal.add_tracks_by_ids(
-                            playlist_id=dest_pl, track_ids=[vid], avoid_duplicates=self.avoid_duplicates
-                        )
-                        inserted += 1
-                    else:
-                        print("  → opción sin id; omitido.")
-                except Exception:
-                    print("  → selección inválida; omitido.")
-                continue
 
-            # 's' u otra cosa → saltar
-            print("  → omitido.")
-            self._log_skipped_track(base, playlist_name, log_path= Path("blob", "skipped_tracks.txt"))
+                if action == "l":
+                    # Listar alternativas usando la búsqueda con scores
+                    opts = self._preview_search_tidal(track=item.track, artist=item.artist, limit=self.per_query_limit)
+                    if not opts:
+                        print("  → sin alternativas; omitido.")
+                        continue
+                    for j, o in enumerate(opts, 1):
+                        print(f"    {j}. {o['title']} — {o['artists']} [score={o['_score']}] (id={o['id']})")
+                    pick = prompt("Elige índice o Enter para omitir", "").strip()
+                    if not pick:
+                        continue
+                    try:
+                        idx = int(pick) - 1
+                        chosen = opts[idx]
+                        vid = chosen.get("id")
+                        if vid:
+                            buffer.add(vid)
+                            inserted += 1
+                        else:
+                            print("  → opción sin id; omitido.")
+                    except Exception:
+                        print("  → selección inválida; omitido.")
+                    continue
 
+                # 's' u otra cosa → saltar
+                print("  → omitido.")
+                skip_log.write(playlist_name, base)
+        finally:
+            buffer.flush()
+            skip_log.close()
 
         # Enviar manuales en un único lote
         if pending_manual_ids:
@@ -334,21 +465,7 @@ class SpotifyToTidalMigrator:
             )
             inserted += len(pending_manual_ids)
 
-        print(f"\nHecho. Insertados: {inserted} / {len(plan)} en '{playlist_name}'.\n")
-
-    def _log_skipped_track(self, base: str, playlist_name: str, log_path: Path) -> None:
-        """
-        Registra en un .txt la pista omitida manualmente (acción 's' u otra no reconocida).
-        Formato: [YYYY-mm-dd HH:MM:SS] <playlist_name> | <base>
-        """
-        try:
-            log_path.parent.mkdir(parents=True, exist_ok=True)
-            with log_path.open("a", encoding="utf-8") as f:
-                f.write(f"{playlist_name} | {base}\n")
-        except Exception as e:
-            # No interrumpir el flujo por un fallo de escritura
-            print(f"(aviso) No se pudo escribir el log de omitidos: {e}")
-
+        print(f"\nHecho. Insertados: {inserted} / {len(tracks)} en '{playlist_name}'.\n")
 
     def migrate_liked_songs(self) -> None:
         """
@@ -364,87 +481,81 @@ class SpotifyToTidalMigrator:
             return
         print(f"Pistas a resolver: {len(tracks)}")
 
-        # 1) Resolver candidatos con score contra TIDAL
-        plan: List[PlannedItem] = []
-        for t in tracks:
-            name = (t.get("name") or "").strip()
-            name = re.sub(r"\([^()]*\)|--.*?--", "", name)
-            artists = t.get("artists") or []
-            artist = (artists[0] or {}).get("name") if artists else None
-            tid, score, info = self.tidal.find_best_match_with_score(
-                track=name, artist=artist, limit=self.per_query_limit
-            )
-            title = (info or {}).get("title")
-            artists_txt = (info or {}).get("artists")
-            plan.append(
-                PlannedItem(
-                    track=name, artist=artist, tidal_id=tid, score=score, title=title, artists=artists_txt
-                )
-            )
-
-        # 2) Añadir a favoritos, pidiendo confirmación en low-score
+        # Resolver candidatos con score contra TIDAL e ir añadiendo a favoritos
+        # los de alta confianza mientras siguen las búsquedas; luego los low-score
         inserted = 0
         pending_manual_ids: List[int] = []
 
-        for i, item in enumerate(plan, 1):
-            base = f"{item.track} — {item.artist or ''}".strip()
-
-            # Alta confianza → añadir directo a favoritos
-            if item.tidal_id and item.score >= self.score_threshold:
-                print(f"{i:>3}. ✅ {base} | {item.title} — {item.artists} [score={item.score}]")
-                self.tidal.add_favorites_by_ids([item.tidal_id], avoid_duplicates=self.avoid_duplicates)
-                inserted += 1
-                continue
-
-            # Baja confianza → interacción (igual que en playlists)
-            sug = f"{item.title or '—'} — {item.artists or '—'}"
-            print(f"{i:>3}. ❓ {base} | Sugerencia: {sug} | score={item.score}")
-            if not PASAR_CANCIONES:
-                action = prompt(
-                    "Acción (A=añadir sugerida, U=URL/ID TIDAL manual, L=listar opciones, S=salta)",
-                    "A" if item.tidal_id else "U",
-                ).lower()
-            else:
-                action = PASAR_CANCIONES
-
-            if action == "a" and item.tidal_id:
-                self.tidal.add_favorites_by_ids([item.tidal_id], avoid_duplicates=self.avoid_duplicates)
-                inserted += 1
-                continue
-
-            if action == "u":
-                manual = prompt("Pega URL/ID de pista de TIDAL (o Enter para omitir)", "").strip()
-                tid_manual = extract_tidal_track_id(manual)
-                if not tid_manual:
-                    print("  → Entrada inválida; omitido.")
+        buffer = _IdBuffer(
+            lambda ids: self.tidal.add_favorites_by_ids(ids, avoid_duplicates=self.avoid_duplicates),
+            self.ADD_BATCH_SIZE,
+        )
+        try:
+            review: List[Tuple[int, PlannedItem]] = []
+            for i, item in enumerate(self._iter_plan(tracks), 1):
+                # Alta confianza → añadir directo a favoritos
+                if item.tidal_id and item.score >= self.score_threshold:
+                    base = f"{item.track} — {item.artist or ''}".strip()
+                    print(f"{i:>3}. ✅ {base} | {item.title} — {item.artists} [score={item.score}]")
+                    buffer.add(item.tidal_id)
+                    inserted += 1
+                else:
+                    review.append((i, item))
+
+            for i, item in review:
+                base = f"{item.track} — {item.artist or ''}".strip()
+
+                # Baja confianza → interacción (igual que en playlists)
+                sug = f"{item.title or '—'} — {item.artists or '—'}"
+                print(f"{i:>3}. ❓ {base} | Sugerencia: {sug} | score={item.score}")
+                if not PASAR_CANCIONES:
+                    action = prompt(
+                        "Acción (A=añadir sugerida, U=URL/ID TIDAL manual, L=listar opciones, S=salta)",
+                        "A" if item.tidal_id else "U",
+                    ).lower()
+                else:
+                    action = PASAR_CANCIONES
+
+                if action == "a" and item.tidal_id:
+                    buffer.add(item.tidal_id)
+                    inserted += 1
                     continue
-                pending_manual_ids.append(tid_manual)
-                continue
 
-            if action == "l":
-                opts = self._preview_search_tidal(track=item.track, artist=item.artist, limit=self.per_query_limit)
-                if not opts:
-                    print("  → sin alternativas; omitido.")
+                if action == "u":
+                    manual = prompt("Pega URL/ID de pista de TIDAL (o Enter para omitir)", "").strip()
+                    tid_manual = extract_tidal_track_id(manual)
+                    if not tid_manual:
+                        print("  → Entrada inválida; omitido.")
+                        continue
+                    pending_manual_ids.append(tid_manual)
                     continue
-                for j, o in enumerate(opts, 1):
-                    print(f"    {j}. {o['title']} — {o['artists']} [score={o['_score']}] (id={o['id']})")
-                pick = prompt("Elige índice o Enter para omitir", "").strip()
-                if not pick:
+
+                if action == "l":
+                    opts = self._preview_search_tidal(track=item.track, artist=item.artist, limit=self.per_query_limit)
+                    if not opts:
+                        print("  → sin alternativas; omitido.")
+                        continue
+                    for j, o in enumerate(opts, 1):
+                        print(f"    {j}. {o['title']} — {o['artists']} [score={o['_score']}] (id={o['id']})")
+                    pick = prompt("Elige índice o Enter para omitir", "").strip()
+                    if not pick:
+                        continue
+                    try:
+                        idx = int(pick) - 1
+                        chosen = opts[idx]
+                        vid = chosen.get("id")
+                        if vid:
+                            buffer.add(vid)
+                            inserted += 1
+                        else:
+                            print("  → opción sin id; omitido.")
+                    except Exception:
+                        print("  → selección inválida; omitido.")
                     continue
-                try:
-                    idx = int(pick) - 1
-                    chosen = opts[idx]
-                    vid = chosen.get("id")
-                    if vid:
-                        self.tidal.add_favorites_by_ids([vid], avoid_duplicates=self.avoid_duplicates)
-                        inserted += 1
-                    else:
-                        print("  → opción sin id; omitido.")
-                except Exception:
-                    print("  → selección inválida; omitido.")
-                continue
 
-            print("  → omitido.")
+                print("  → omitido.")
+        finally:
+            buffer.flush()
 
         if pending_manual_ids:
             self.tidal.add_favorites_by_ids(
@@ -452,22 +563,72 @@ class SpotifyToTidalMigrator:
             )
             inserted += len(pending_manual_ids)
 
-        print(f"\nHecho. Insertados en Favoritos: {inserted} / {len(plan)}.\n")
+        print(f"\nHecho. Insertados en Favoritos: {inserted} / {len(tracks)}.\n")
 
     # ------------------------
     # Helpers
     # ------------------------
+    def _iter_plan(self, tracks: List[Dict[str, Any]]) -> Iterator[PlannedItem]:
+        """
+        Resuelve las pistas contra TIDAL en paralelo y entrega cada PlannedItem
+        (en orden) en cuanto su búsqueda termina, para ir insertando mientras tanto.
+        """
+        queries: List[Tuple[str, Optional[str]]] = []
+        for t in tracks:
+            name = _CLEAN_TITLE_RE.sub("", t.get("name") or "").strip()
+            artists = t.get("artists")
+            artist = artists[0].get("name") if artists and artists[0] else None
+            queries.append((name, artist))
+
+        # Las pistas repetidas (misma consulta enviada a TIDAL, salvo mayúsculas
+        # y espacios) se resuelven una sola vez y luego se expanden al orden
+        # original. La caché es compartida entre playlists y Liked Songs.
+        keys = [match_key(name, artist, self.per_query_limit) for name, artist in queries]
+        unique: Dict[MatchKey, Tuple[str, Optional[str]]] = {}
+        for key, q in zip(keys, queries):
+            unique.setdefault(key, q)
+        results: Dict[MatchKey, Optional[MatchResult]] = {k: self._match_cache.get(k) for k in unique}
+        missing = [k for k, r in results.items() if r is None]
+        # Las claves ausentes llegan en orden de primera aparición, así que
+        # el siguiente resultado del stream es siempre el de la próxima clave nueva.
+        fetched = self.tidal.iter_best_matches(
+            [unique[k] for k in missing],
+            limit=self.per_query_limit,
+            max_workers=self.max_concurrency,
+        )
+        fresh: List[Tuple[MatchKey, MatchResult]] = []
+        try:
+            for (name, artist), key in zip(queries, keys):
+                result = results[key]
+                if result is None:
+                    result = results[key] = next(fetched)
+                    fresh.append((key, result))
+                tid, score, info = result
+                yield PlannedItem(
+                    track=name,
+                    artist=artist,
+                    tidal_id=tid,
+                    score=score,
+                    title=(info or {}).get("title"),
+                    artists=(info or {}).get("artists"),
+                )
+        finally:
+            # Un único commit por playlist (también si se corta a medias)
+            self._match_cache.put_many(fresh)
+
     def _preview_search_tidal(self, *, track: str, artist: Optional[str], limit: int = 5) -> List[Dict[str, Any]]:
         """Devuelve candidatos formateados de TIDAL (id, title, artists, _score)."""
         items = self.tidal.search_tracks_with_scores(track=track, artist=artist, limit=limit)
         out: List[Dict[str, Any]] = []
         if not items:
             return out
-        for it in items:
+        # `items` ya viene ordenado por _score (desc): solo se formatean los top-N
+        for it in items[:limit]:
+            artists = it.get("artists") or []
             out.append({
                 "id": it.get("id"),
                 "title": it.get("title"),
-                "artists": ", ".join(a.get("name") for a in (it.get("artists") or [])),
+                "artists": ", ".join([a["name"] for a in artists if a and a.get("name")]),
                 "_score": int(it.get("_score", 0)),
             })
         return out
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.utils import json_codec
+
+
+class PlaylistTracksCache:
+    """
+    Caché en disco (sqlite) de pistas de playlists de Spotify, validada por
+    `snapshot_id`: mientras la playlist no cambie, su snapshot es el mismo y
+    se evita volver a paginar todas sus pistas. Liked Songs se guarda con la
+    clave "/me/tracks" y un validador calculado de su primera página.
+
+    Es seguro usarla desde varios hilos (las descargas van en paralelo).
+    """
+
+    def __init__(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS playlist_tracks ("
+            " playlist_id TEXT PRIMARY KEY, snapshot_id TEXT, payload BLOB, mtime REAL)"
+        )
+        self._db.commit()
+
+    def get(self, playlist_id: str, snapshot_id: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        if not snapshot_id:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM playlist_tracks WHERE playlist_id = ? AND snapshot_id = ?",
+                (playlist_id, snapshot_id),
+            ).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def put(self, playlist_id: str, snapshot_id: Optional[str], tracks: List[Dict[str, Any]]) -> None:
+        if not snapshot_id:
+            return
+        payload = json_codec.dumps(tracks)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO playlist_tracks (playlist_id, snapshot_id, payload, mtime)"
+                " VALUES (?, ?, ?, ?)",
+                (playlist_id, snapshot_id, payload, time.time()),
+            )
+            self._db.commit()
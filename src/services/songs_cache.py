@@ -1,14 +1,13 @@
 from __future__ import annotations
 
-import json
 from decimal import Decimal
 from typing import Any, Dict, List
 
 import boto3
 
 from src.core.settings.aws_service import get_aws_settings
+from src.utils import json_codec
 
-aws_settings = get_aws_settings()
 SONGS_CACHE_KEY = "songs.json"
 
 
@@ -22,6 +21,7 @@ def _json_default(value: Any) -> Any:
 
 class SongsCacheExporter:
     def __init__(self) -> None:
+        aws_settings = get_aws_settings()
         profile = aws_settings.profile
         session_kwargs: Dict[str, Any] = {"region_name": aws_settings.region}
         if profile:
@@ -42,7 +42,7 @@ class SongsCacheExporter:
             "songs": songs,
             "updatedAt": _now_iso(),
         }
-        body = json.dumps(payload, default=_json_default, ensure_ascii=False).encode("utf-8")
+        body = json_codec.dumps(payload, default=_json_default)
 
         self.s3.put_object(
             Bucket=self.front_bucket_name,
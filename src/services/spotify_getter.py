@@ -41,28 +41,61 @@ import base64
 import hashlib
 import json
 import os
-import random
+import secrets
+import selectors
 import socket
-import string
 import threading
 import time
 import urllib.parse
 import webbrowser
 from dataclasses import dataclass
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Any, Dict, Optional, List
+from functools import lru_cache
+from typing import Any, Dict, Optional, List, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from src.core.settings.spotify_service import get_spotify_settings
-
-spotify_settings = get_spotify_settings()
-
+from src.utils import json_codec
 
 SPOTIFY_AUTH_URL = "https://accounts.spotify.com/authorize"
 SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
 SPOTIFY_API_BASE = "https://api.spotify.com/v1"
 
+# El endpoint de token no debe recibir el Bearer de la sesión (None => requests lo omite)
+_NO_AUTH = {"Authorization": None}
+
+
+def _http_response(status: str, body: bytes, content_type: str = "text/plain; charset=utf-8") -> bytes:
+    """Respuesta HTTP/1.1 completa (cabeceras + cuerpo) lista para un único sendall()."""
+    return (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode("ascii") + body
+
+
+@lru_cache(maxsize=256)
+def _resolve_request(method: str, endpoint: str) -> Tuple[str, str]:
+    """(método, endpoint relativo) -> (MÉTODO, URL absoluta); los endpoints se repiten mucho."""
+    endpoint = endpoint.lstrip("/")
+    if endpoint.startswith("v1/"):
+        return method.upper(), f"https://api.spotify.com/{endpoint}"
+    return method.upper(), f"{SPOTIFY_API_BASE}/{endpoint}"
+
+
+# Respuestas del callback OAuth precalculadas (cabeceras + cuerpo, un solo envío)
+_OAUTH_OK_RESPONSE = _http_response(
+    "200 OK",
+    b"<html><body><h2>Autorizaci\xc3\xb3n completada</h2>\n"
+    b"<p>Ya puedes volver a la aplicaci\xc3\xb3n. Esta ventana se puede cerrar.</p>"
+    b"</body></html>",
+    "text/html; charset=utf-8",
+)
+_OAUTH_MISSING_CODE_RESPONSE = _http_response("400 Bad Request", b"Missing 'code' parameter")
+_OAUTH_NOT_FOUND_RESPONSE = _http_response("404 Not Found", b"Not Found")
+
 
 @dataclass
 class Token:
@@ -109,17 +142,60 @@ class SpotifyUserClient:
         client_id: str,
         redirect_uri: str = "http://localhost:8080/callback",
         scope: str = "user-read-email user-read-private",
-        user_name : str = "Unai", token_base_name: str = "spotify_token", token_dir_path: str = "tokens"
+        user_name : str = "Unai", token_base_name: str = "spotify_token", token_dir_path: str = "tokens",
+        max_in_flight: int = 10,
     ) -> None:
         self.client_id = client_id
         self.redirect_uri = redirect_uri
+        # Se analiza una sola vez (y se valida ya, no al primer authenticate())
+        parsed = urllib.parse.urlparse(redirect_uri)
+        if parsed.scheme != "http" or parsed.hostname not in {"localhost", "127.0.0.1"}:
+            raise ValueError(
+                "El redirect_uri debe ser http://localhost:<puerto>/... para el servidor local"
+            )
+        self._callback_port_val = parsed.port or 80
+        self._callback_path = parsed.path or "/callback"
         self.scope = scope
         self.token_path = f"{token_dir_path}/{token_base_name}_{user_name}.json"
         self.user_name = user_name
 
         self._code_verifier: Optional[str] = None
+        self._code_challenge_cached: Optional[str] = None
         self._token: Optional[Token] = None
 
+        # Sesión HTTP reutilizable: keep-alive + pool de conexiones de urllib3
+        # (evita un handshake TCP+TLS por petición al paginar). Los 429 no se
+        # reintentan aquí: urllib3 dormiría el Retry-After dentro del semáforo
+        # y se sumaría a los reintentos de _send
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=20,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.3,
+                    status_forcelist=[500, 502, 503, 504],
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                ),
+            ),
+        )
+        self._session.headers["User-Agent"] = "music_migrator/1.0"
+        # Máximo de peticiones simultáneas a la Web API (paginación en paralelo)
+        self._rate_limiter = threading.BoundedSemaphore(max_in_flight)
+
+    def close(self) -> None:
+        """Cierra la sesión HTTP subyacente."""
+        self._session.close()
+
+    def __enter__(self) -> "SpotifyUserClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
     # ------------------------
     # Autenticación (PKCE)
     # ------------------------
@@ -127,7 +203,7 @@ class SpotifyUserClient:
         """Asegura que hay un access token válido; si no, lanza el flujo PKCE.
         """
         # 1) Intenta cargar token desde disco
-        self._token = self._load_token()
+        self._set_token(self._load_token())
         if self._token and not self._token.is_expired:
             return
 
@@ -145,17 +221,14 @@ class SpotifyUserClient:
         self._pkce_prepare()
         auth_url = self._build_auth_url()
 
-        # Abrimos el navegador y esperamos el code con un servidor local temporal
-        self._ensure_port_available(self._callback_port)
-        server, code_holder = self._start_local_server_and_wait_for_code()
-
-        webbrowser.open(auth_url)
-
-        # Esperar a que llegue el code (con timeout)
-        code = code_holder.wait_for_code(timeout=180)
-        # Cerrar servidor
-        server.shutdown()
-        server.server_close()
+        # Abrimos el navegador y esperamos el code en un socket local temporal
+        sock = self._open_callback_socket()
+        try:
+            webbrowser.open(auth_url)
+            # Esperar a que llegue el code (con timeout)
+            code = self._wait_for_code(sock, timeout=180)
+        finally:
+            sock.close()
 
         if not code:
             raise RuntimeError("No se recibió el 'code' de autorización a tiempo.")
@@ -169,22 +242,19 @@ class SpotifyUserClient:
     # ------------------------
     @property
     def _callback_port(self) -> int:
-        parsed = urllib.parse.urlparse(self.redirect_uri)
-        if parsed.scheme != "http" or parsed.hostname not in {"localhost", "127.0.0.1"}:
-            raise ValueError(
-                "El redirect_uri debe ser http://localhost:<puerto>/... para el servidor local"
-            )
-        return parsed.port or 80
+        return self._callback_port_val
 
     def _pkce_prepare(self) -> None:
         verifier = self._gen_code_verifier()
         self._code_verifier = verifier
+        # El challenge es fijo durante el flujo: se calcula una sola vez
+        self._code_challenge_cached = self._code_challenge(verifier)
 
     @staticmethod
     def _gen_code_verifier(length: int = 64) -> str:
-        # RFC 7636: 43..128 chars, [A-Za-z0-9-._~]
-        alphabet = string.ascii_letters + string.digits + "-._~"
-        return "".join(random.choice(alphabet) for _ in range(length))
+        # RFC 7636: 43..128 chars, [A-Za-z0-9-._~]; base64url (CSPRNG) es un
+        # subconjunto válido y 3 bytes => 4 caracteres
+        return secrets.token_urlsafe(length * 3 // 4)
 
     @staticmethod
     def _code_challenge(verifier: str) -> str:
@@ -192,7 +262,7 @@ class SpotifyUserClient:
         return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
 
     def _build_auth_url(self) -> str:
-        if not self._code_verifier:
+        if not (self._code_verifier and self._code_challenge_cached):
             raise RuntimeError("PKCE no inicializado")
         params = {
             "client_id": self.client_id,
@@ -200,73 +270,100 @@ class SpotifyUserClient:
             "redirect_uri": self.redirect_uri,
             "scope": self.scope,
             "code_challenge_method": "S256",
-            "code_challenge": self._code_challenge(self._code_verifier),
+            "code_challenge": self._code_challenge_cached,
             "show_dialog": True,
             # opcional: state
         }
         return f"{SPOTIFY_AUTH_URL}?{urllib.parse.urlencode(params)}"
 
-    class _CodeHolder:
-        def __init__(self):
-            self._code: Optional[str] = None
-            self._event = threading.Event()
-
-        def set_code(self, code: str) -> None:
-            self._code = code
-            self._event.set()
-
-        def wait_for_code(self, timeout: int = 180) -> Optional[str]:
-            ok = self._event.wait(timeout)
-            return self._code if ok else None
-
-    def _start_local_server_and_wait_for_code(self):
-        code_holder = self._CodeHolder()
-        redirect_path = urllib.parse.urlparse(self.redirect_uri).path or "/callback"
-
-        class Handler(BaseHTTPRequestHandler):
-            def do_GET(self):  # noqa: N802 (nombre según BaseHTTPRequestHandler)
-                parsed = urllib.parse.urlparse(self.path)
-                if parsed.path != redirect_path:
-                    self.send_response(404)
-                    self.end_headers()
-                    self.wfile.write(b"Not Found")
-                    return
-                qs = urllib.parse.parse_qs(parsed.query)
-                if "code" in qs:
-                    code_holder.set_code(qs["code"][0])
-                    self.send_response(200)
-                    self.send_header("Content-Type", "text/html; charset=utf-8")
-                    self.end_headers()
-                    self.wfile.write(
-                        b"<html><body><h2>Autorizaci\xc3\xb3n completada</h2>\n"
-                        b"<p>Ya puedes volver a la aplicaci\xc3\xb3n. Esta ventana se puede cerrar.</p>"
-                        b"</body></html>"
-                    )
-                else:
-                    self.send_response(400)
-                    self.end_headers()
-                    self.wfile.write(b"Missing 'code' parameter")
-
-            def log_message(self, fmt, *args):
-                # Silenciar logs en consola
-                return
+    def _open_callback_socket(self) -> socket.socket:
+        """Socket de escucha para el redirect; el propio bind es la comprobación del puerto."""
+        port = self._callback_port
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(("127.0.0.1", port))
+        except OSError:
+            sock.close()
+            raise OSError(
+                f"El puerto {port} parece ocupado. Cierra el proceso que lo use o cambia el redirect_uri."
+            )
+        sock.listen(4)
+        sock.setblocking(False)
+        return sock
 
-        server = HTTPServer(("127.0.0.1", self._callback_port), Handler)
+    def _wait_for_code(self, sock: socket.socket, timeout: int = 180) -> Optional[str]:
+        """
+        Bucle de un solo hilo sobre `selectors`: acepta conexiones hasta recibir
+        el GET del redirect con ?code=..., responde y devuelve el code.
+        Atiende varias conexiones a la vez (favicon, preconexiones del navegador).
+        """
+        sel = selectors.DefaultSelector()
+        sel.register(sock, selectors.EVENT_READ)
+        buffers: Dict[socket.socket, bytes] = {}
+        deadline = time.monotonic() + timeout
 
-        # Ejecutar servidor en hilo dedicado
-        t = threading.Thread(target=server.serve_forever, daemon=True)
-        t.start()
-        return server, code_holder
+        def _drop(conn: socket.socket) -> None:
+            sel.unregister(conn)
+            buffers.pop(conn, None)
+            conn.close()
 
-    @staticmethod
-    def _ensure_port_available(port: int) -> None:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            try:
-                s.bind(("127.0.0.1", port))
-            except OSError:
-                raise OSError(
-                    f"El puerto {port} parece ocupado. Cierra el proceso que lo use o cambia el redirect_uri."
-                )
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                for key, _ in sel.select(remaining):
+                    conn = key.fileobj
+                    if conn is sock:
+                        try:
+                            new_conn, _ = sock.accept()
+                        except BlockingIOError:
+                            continue
+                        new_conn.setblocking(False)
+                        new_conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                        sel.register(new_conn, selectors.EVENT_READ)
+                        buffers[new_conn] = b""
+                        continue
+
+                    try:
+                        chunk = conn.recv(4096)
+                    except (BlockingIOError, InterruptedError):
+                        continue
+                    except OSError:
+                        chunk = b""
+                    if not chunk:
+                        _drop(conn)
+                        continue
+                    buf = buffers[conn] + chunk
+                    if b"\r\n\r\n" not in buf and len(buf) < 65536:
+                        buffers[conn] = buf
+                        continue
+
+                    code, response = self._handle_callback_request(buf)
+                    try:
+                        conn.setblocking(True)
+                        conn.sendall(response)
+                    except OSError:
+                        pass
+                    _drop(conn)
+                    if code:
+                        return code
+            return None
+        finally:
+            for conn in list(buffers):
+                _drop(conn)
+            sel.close()
+
+    def _handle_callback_request(self, raw: bytes):
+        """Analiza la petición cruda -> (code | None, respuesta HTTP en bytes)."""
+        request_line = raw.split(b"\r\n", 1)[0].decode("latin-1")
+        parts = request_line.split(" ")
+        target = parts[1] if len(parts) >= 2 and parts[0] == "GET" else ""
+        parsed = urllib.parse.urlparse(target)
+        if parsed.path != self._callback_path:
+            return None, _OAUTH_NOT_FOUND_RESPONSE
+        qs = urllib.parse.parse_qs(parsed.query)
+        if "code" not in qs:
+            return None, _OAUTH_MISSING_CODE_RESPONSE
+        return qs["code"][0], _OAUTH_OK_RESPONSE
 
     def _exchange_code_for_token(self, code: str) -> None:
         if not self._code_verifier:
@@ -279,14 +376,14 @@ class SpotifyUserClient:
             "redirect_uri": self.redirect_uri,
             "code_verifier": self._code_verifier,
         }
-        resp = requests.post(SPOTIFY_TOKEN_URL, data=data, timeout=20)
+        resp = self._session.request("POST", SPOTIFY_TOKEN_URL, data=data, headers=_NO_AUTH, timeout=20)
         self._raise_for_token_error(resp)
-        payload = resp.json()
-        self._token = Token(
+        payload = json_codec.loads(resp.content)
+        self._set_token(Token(
             access_token=payload["access_token"],
             refresh_token=payload.get("refresh_token"),
             expires_at=time.time() + int(payload.get("expires_in", 3600)),
-        )
+        ))
 
     def _refresh_token(self) -> None:
         if not (self._token and self._token.refresh_token):
@@ -296,15 +393,23 @@ class SpotifyUserClient:
             "grant_type": "refresh_token",
             "refresh_token": self._token.refresh_token,
         }
-        resp = requests.post(SPOTIFY_TOKEN_URL, data=data, timeout=20)
+        resp = self._session.request("POST", SPOTIFY_TOKEN_URL, data=data, headers=_NO_AUTH, timeout=20)
         self._raise_for_token_error(resp)
-        payload = resp.json()
+        payload = json_codec.loads(resp.content)
         # En refresh, Spotify puede devolver un nuevo refresh_token o no
-        self._token = Token(
+        self._set_token(Token(
             access_token=payload["access_token"],
             refresh_token=payload.get("refresh_token", self._token.refresh_token),
             expires_at=time.time() + int(payload.get("expires_in", 3600)),
-        )
+        ))
+
+    def _set_token(self, token: Optional[Token]) -> None:
+        """Actualiza el token y la cabecera Authorization de la sesión (una vez por token)."""
+        self._token = token
+        if token is not None:
+            self._session.headers["Authorization"] = f"Bearer {token.access_token}"
+        else:
+            self._session.headers.pop("Authorization", None)
 
     @staticmethod
     def _raise_for_token_error(resp: requests.Response) -> None:
@@ -319,11 +424,14 @@ class SpotifyUserClient:
     # Persistencia del token
     # ------------------------
     def _load_token(self) -> Optional[Token]:
+        # Ya cargado/obtenido en este proceso: no volver a leer ni parsear el fichero
+        if self._token is not None:
+            return self._token
         if not os.path.exists(self.token_path):
             return None
         try:
-            with open(self.token_path, "r", encoding="utf-8") as f:
-                payload = json.load(f)
+            with open(self.token_path, "rb") as f:
+                payload = json_codec.loads(f.read())
             return Token(
                 access_token=payload["access_token"],
                 refresh_token=payload.get("refresh_token"),
@@ -340,8 +448,13 @@ class SpotifyUserClient:
             "refresh_token": self._token.refresh_token,
             "expires_at": self._token.expires_at,
         }
-        with open(self.token_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2)
+        # Escritura atómica: un fallo a mitad no deja el token corrupto
+        tmp = self.token_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json_codec.dumps(payload))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.token_path)
 
     # ------------------------
     # Llamadas a la Web API
@@ -369,39 +482,54 @@ class SpotifyUserClient:
         endpoint: '/me', '/me/playlists', etc. (con o sin prefijo '/v1')
         """
         self._ensure_access_token()
-        url = endpoint
-        if not endpoint.startswith("http"):
-            endpoint = endpoint.lstrip("/")
-            if not endpoint.startswith("v1/"):
-                url = f"{SPOTIFY_API_BASE}/{endpoint}"
-            else:
-                url = f"https://api.spotify.com/{endpoint}"
-
-        headers = {"Authorization": f"Bearer {self._token.access_token}"}
-        resp = requests.request(
-            method=method.upper(),
-            url=url,
-            headers=headers,
-            params=params,
-            json=json_body,
-            timeout=20,
-        )
+        if endpoint.startswith("http"):
+            # URL absoluta ('next' o páginas precalculadas): no pasa por la caché
+            method, url = method.upper(), endpoint
+        else:
+            method, url = _resolve_request(method, endpoint)
+
+        resp = self._send(method, url, params, json_body)
         if resp.status_code == 401:
             # token expirado o inválido; intentar refrescar una vez
             if self._token and self._token.refresh_token:
                 self._refresh_token()
                 self._save_token()
-                headers["Authorization"] = f"Bearer {self._token.access_token}"
-                resp = requests.request(
-                    method=method.upper(),
+                resp = self._send(method, url, params, json_body)
+        resp.raise_for_status()
+        return json_codec.loads(resp.content) if resp.content else {}
+
+    MAX_429_RETRIES = 3
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        json_body: Optional[Dict[str, Any]],
+    ) -> requests.Response:
+        """
+        Envía la petición limitando las simultáneas. Los 429 solo se reintentan
+        aquí (hasta MAX_429_RETRIES veces): se espera lo que indique Retry-After
+        fuera del semáforo, sin ocupar un hueco mientras tanto.
+        """
+        for attempt in range(self.MAX_429_RETRIES + 1):
+            # La cabecera Authorization ya está en la sesión (ver _set_token)
+            with self._rate_limiter:
+                resp = self._session.request(
+                    method=method,
                     url=url,
-                    headers=headers,
                     params=params,
                     json=json_body,
                     timeout=20,
                 )
-        resp.raise_for_status()
-        return resp.json() if resp.content else {}
+            if resp.status_code != 429 or attempt == self.MAX_429_RETRIES:
+                return resp
+            try:
+                wait = float(resp.headers.get("Retry-After", 1))
+            except ValueError:
+                wait = 1.0
+            time.sleep(max(wait, 0.0))
+        return resp
 
     # ------------------------
     # Atajos centrados en usuario
@@ -435,7 +563,9 @@ class SpotifyUserClient:
 
 # Si ejecutas este archivo directamente, lanzamos un mini demo CLI
 if __name__ == "__main__":
-    
+    from src.core.settings.spotify_service import get_spotify_settings
+
+    spotify_settings = get_spotify_settings()
 
     client = SpotifyUserClient(
         client_id=spotify_settings.client_id, redirect_uri="http://127.0.0.1:8080/callback"
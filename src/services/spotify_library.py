@@ -1,26 +1,179 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Iterator, Any, Literal
+import asyncio
+import hashlib
+import sys
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Iterator, Any, Literal, Sequence, Tuple, Union
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# Importa tu cliente ya funcional
-# from spotify_client import SpotifyUserClient   # si lo tienes en otro módulo
-# En tu caso:
-from src.core.settings.spotify_service import get_spotify_settings
-from collections import deque
-spotify_settings = get_spotify_settings()
+from pathlib import Path
+from .spotify_getter import SPOTIFY_API_BASE
+from .playlist_cache import PlaylistTracksCache
+from src.utils.concurrency import iter_map_ordered
 # from <ruta_donde_este_tu_clase> import SpotifyUserClient
 
+_EMPTY: Dict[str, Any] = {}
+
+# Tamaños máximos de página que admite cada endpoint
+MAX_LIMIT_PLAYLISTS = 50
+MAX_LIMIT_SAVED = 50
+MAX_LIMIT_TRACKS = 100
+
+# Filtros `fields` (solo lo necesario + paginación), construidos una sola vez
+_FIELDS_PLAYLISTS = "items(id,name,snapshot_id,owner(id,display_name),tracks(total)),next,total"
+_FIELDS_SAVED = (
+    "items(added_at,track(id,name,duration_ms,is_local,"
+    "album(id,name),artists(id,name))),next,total"
+)
+_FIELDS_TRACKS = (
+    "items(added_at, added_by, track(id,name,duration_ms,is_local,"
+    "album(id,name),artists(id,name))),next,total"
+)
+
+
+# Clave de Liked Songs en la caché de pistas (junto a las de cada playlist)
+_SAVED_TRACKS_KEY = "/me/tracks"
+
+
+def _clamp_limit(page_size: int, max_limit: int) -> int:
+    if page_size >= max_limit:
+        return max_limit
+    return page_size if page_size > 0 else 1
+
+# Sesión compartida para descargas de la CDN de Spotify (portadas): keep-alive
+# y pool de conexiones en lugar de un handshake TCP+TLS por imagen
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503, 504],
+            respect_retry_after_header=True,
+        ),
+    ),
+)
+
+
+def _intern(s: Optional[str]) -> Optional[str]:
+    # Los ids de artista/álbum se repiten en toda la biblioteca: una sola copia por id
+    return sys.intern(s) if s else s
+
+
+def _artist_row(a: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": _intern(a.get("id")), "name": a.get("name")}
+
+
+def _image_width(img: Dict[str, Any]) -> int:
+    return int(img.get("width") or 0)
+
+
+def _track_row(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Proyecta un item de /playlists/{id}/tracks o /me/tracks; None si no trae pista."""
+    t = item.get("track")
+    if not t:
+        return None  # puede haber items 'vacíos' o eliminados
+    added_by = (item.get("added_by") or _EMPTY).get("id")
+    # Camino rápido: con `fields` Spotify devuelve todas las claves pedidas;
+    # si falta alguna (o llega a null) se cae al camino seguro
+    try:
+        album = t["album"]
+        return {
+            "id": t["id"],
+            "name": t["name"],
+            "duration_ms": t["duration_ms"],
+            "is_local": t["is_local"],
+            "added_at": item["added_at"],
+            "added_by": added_by,
+            "album": {"id": _intern(album["id"]), "name": album["name"]},
+            "artists": [{"id": _intern(a["id"]), "name": a["name"]} for a in t["artists"]],
+        }
+    except (KeyError, TypeError):
+        pass
+    t_get = t.get
+    album = t_get("album") or _EMPTY
+    return {
+        "id": t_get("id"),
+        "name": t_get("name"),
+        "duration_ms": t_get("duration_ms"),
+        "is_local": t_get("is_local"),
+        "added_at": item.get("added_at"),
+        "added_by": added_by,
+        "album": {"id": _intern(album.get("id")), "name": album.get("name")},
+        "artists": list(map(_artist_row, t_get("artists") or ())),
+    }
+
+
+def _page_digest(page: Dict[str, Any]) -> str:
+    """
+    Validador para listados sin snapshot_id (p.ej. /me/tracks): 'total' más
+    un hash de (id, added_at) de la primera página. Guardar una canción la
+    pone al principio y quitarla cambia el total.
+    """
+    h = hashlib.sha1()
+    for item in page.get("items") or ():
+        h.update(f"{(item.get('track') or _EMPTY).get('id')}|{item.get('added_at')}\n".encode("utf-8"))
+    return f"{page.get('total')}:{h.hexdigest()}"
+
+
+def _playlist_row(p: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        owner = p["owner"]
+        return {
+            "id": p["id"],
+            "name": p["name"],
+            "owner_id": owner["id"],
+            "owner_display_name": owner["display_name"],
+            "tracks_total": p["tracks"]["total"],
+            "snapshot_id": p["snapshot_id"],
+        }
+    except (KeyError, TypeError):
+        pass
+    p_get = p.get
+    owner = p_get("owner") or _EMPTY
+    return {
+        "id": p_get("id"),
+        "name": p_get("name"),
+        "owner_id": owner.get("id"),
+        "owner_display_name": owner.get("display_name"),
+        "tracks_total": (p_get("tracks") or _EMPTY).get("total"),
+        "snapshot_id": p_get("snapshot_id"),
+    }
+
 
 class SpotifyLibrary:
     """
     Envuelve un SpotifyUserClient para operaciones de biblioteca:
     - get_my_playlists(): lista las playlists del usuario autenticado.
     - get_playlist_tracks(playlist_id): lista pistas (con artistas) de una playlist.
+    - iter_playlists_with_tracks(): playlists + descarga solapada de sus pistas (async).
+    - get_many_playlist_tracks(ids): pistas de varias playlists en paralelo.
+    - download_to_path(url, path): descarga por bloques directamente a disco.
+    - download_best_images(ids): portadas de varias playlists en paralelo.
     """
 
-    def __init__(self, client: "SpotifyUserClient") -> None:
+    def __init__(
+        self,
+        client: "SpotifyUserClient",
+        session: Optional[requests.Session] = None,
+        page_concurrency: int = 4,
+        tracks_cache_path: Optional[Path] = None,
+    ) -> None:
         self.client = client
+        self.session = session or _SESSION
+        # Páginas pedidas a la vez por listado (acotado para no provocar 429)
+        self.page_concurrency = page_concurrency
+        # Imágenes por playlist (se consultan con varias estrategias)
+        self._images_cache: Dict[str, List[Dict[str, Any]]] = {}
+        # Caché opcional de pistas por playlist, validada por snapshot_id
+        self._tracks_cache = PlaylistTracksCache(tracks_cache_path) if tracks_cache_path else None
 
     # ------------------------
     # Playlists del usuario
@@ -34,41 +187,63 @@ class SpotifyLibrary:
         Devuelve las playlists del usuario autenticado.
         - max_total: limita el nº total a devolver (None => traer todas)
         - page_size: tamaño de página (máx. 50 en /me/playlists)
-        Retorna lista de dicts: {id, name, owner_id, owner_display_name, tracks_total}
+        Retorna lista de dicts: {id, name, owner_id, owner_display_name, tracks_total, snapshot_id}
         """
-        params = {
-            "limit": min(max(page_size, 1), 50),
-            # afinamos fields para minimizar payload
-            "fields": "items(id,name,owner(id,display_name),tracks(total)),next,total"
-        }
+        params = {"limit": _clamp_limit(page_size, MAX_LIMIT_PLAYLISTS), "fields": _FIELDS_PLAYLISTS}
         results: List[Dict[str, Any]] = []
 
-        for page in self._paginate("/me/playlists", params=params):
-            items = page.get("items", []) or []
-            for p in items:
-                results.append({
-                    "id": p.get("id"),
-                    "name": p.get("name"),
-                    "owner_id": (p.get("owner") or {}).get("id"),
-                    "owner_display_name": (p.get("owner") or {}).get("display_name"),
-                    "tracks_total": (p.get("tracks") or {}).get("total"),
-                })
-                if max_total is not None and len(results) >= max_total:
-                    return results[:max_total]
-        return results
+        for page in self._all_pages("/me/playlists", params=params, max_total=max_total):
+            results.extend(map(_playlist_row, page.get("items") or ()))
+        return results if max_total is None else results[:max_total]
     
+    async def iter_playlists_with_tracks(
+        self,
+        *,
+        page_size: int = 50,
+        max_concurrency: int = 10,
+        skip: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> AsyncIterator[Tuple[Dict[str, Any], Optional["asyncio.Task[List[Dict[str, Any]]]"]]]:
+        """
+        Recorre las playlists del usuario y, en cuanto se conoce cada id, lanza
+        en segundo plano la descarga de sus pistas (máx. `max_concurrency` a
+        la vez) mientras se siguen pidiendo páginas de /me/playlists.
+        Entrega (playlist, task) en orden; `await task` da sus pistas.
+        Si `skip(playlist)` es True no se descarga nada y task es None.
+        """
+        params = {"limit": _clamp_limit(page_size, MAX_LIMIT_PLAYLISTS), "fields": _FIELDS_PLAYLISTS}
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def _tracks(row: Dict[str, Any]) -> List[Dict[str, Any]]:
+            async with sem:
+                return await asyncio.to_thread(
+                    self.get_playlist_tracks, row["id"], snapshot_id=row.get("snapshot_id")
+                )
+
+        async for page in self._aiter_pages("/me/playlists", params):
+            for p in page.get("items") or ():
+                row = _playlist_row(p)
+                if skip is not None and skip(row):
+                    yield row, None
+                else:
+                    yield row, asyncio.ensure_future(_tracks(row))
+
     def get_playlist_images(self, playlist_id: str) -> List[Dict[str, Any]]:
         """
         Devuelve el array de ImageObject de Spotify:
         [{url, width, height}, ...] (orden habitual: mayor→menor).
         """
+        cached = self._images_cache.get(playlist_id)
+        if cached is not None:
+            return cached
         endpoint = f"/playlists/{playlist_id}/images"
         # api_request maneja auth; este endpoint devuelve JSON
         images = self.client.api_request("GET", endpoint)
         # Algunas libs devuelven dict; normalizamos a lista
         if isinstance(images, dict):
             images = images.get("images") or images.get("items") or []
-        return images or []
+        images = images or []
+        self._images_cache[playlist_id] = images
+        return images
 
     def get_best_playlist_image_url(
         self,
@@ -82,70 +257,114 @@ class SpotifyLibrary:
         imgs = self.get_playlist_images(playlist_id)
         if not imgs:
             return None
-        def _w(o): 
-            # Algunos objetos pueden no traer width/height
-            return int(o.get("width") or 0)
-        imgs_sorted = sorted(imgs, key=_w, reverse=(strategy == "largest"))
-        return imgs_sorted[0].get("url")
+        if len(imgs) == 1:
+            return imgs[0].get("url")
+        # Una sola pasada; algunos objetos pueden no traer width/height
+        pick = max if strategy == "largest" else min
+        return pick(imgs, key=_image_width).get("url")
 
-    def download_bytes_from_url(self, url: str, timeout: int = 20) -> Optional[bytes]:
+    def download_bytes_from_url(
+        self, url: str, timeout: int = 20, return_type: bool = False
+    ) -> Union[Optional[bytes], Tuple[Optional[bytes], Optional[str]]]:
         """
         Descarga bytes de imagen desde la CDN de Spotify (URLs temporales).
+        Con `return_type=True` devuelve (bytes, content_type).
         """
         try:
-            r = requests.get(url, timeout=timeout)
+            r = self.session.get(url, timeout=timeout)
             r.raise_for_status()
-            return r.content
+            data, ctype = r.content, r.headers.get("Content-Type")
         except Exception:
-            return None
-        
+            data, ctype = None, None
+        return (data, ctype) if return_type else data
 
+    def download_best_images(
+        self,
+        playlist_ids: Sequence[str],
+        strategy: Literal["largest", "smallest"] = "largest",
+        max_workers: int = 4,
+    ) -> Dict[str, Optional[bytes]]:
+        """
+        Portadas de varias playlists a la vez: resuelve la URL y descarga la
+        imagen de cada una en un pool de hilos (máx. `max_workers`, bajo para
+        no provocar 429) -> {playlist_id: bytes | None}, en el orden de entrada.
+        """
+        def _fetch_one(pid: str) -> Optional[bytes]:
+            url = self.get_best_playlist_image_url(pid, strategy=strategy)
+            return self.download_bytes_from_url(url) if url else None
+
+        if not playlist_ids:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(playlist_ids)))) as ex:
+            return dict(zip(playlist_ids, ex.map(_fetch_one, playlist_ids)))
+
+    def download_to_path(
+        self,
+        url: str,
+        path: Union[str, Path],
+        timeout: int = 20,
+        return_type: bool = False,
+        chunk_size: int = 64 * 1024,
+    ) -> Union[bool, Tuple[bool, Optional[str]]]:
+        """
+        Descarga `url` directamente a `path` por bloques (memoria constante,
+        sin materializar la imagen entera en RAM). Si falla, no deja fichero.
+        Con `return_type=True` devuelve (ok, content_type).
+        """
+        path = Path(path)
+        ok, ctype = False, None
+        try:
+            with self.session.get(url, timeout=timeout, stream=True) as r:
+                r.raise_for_status()
+                ctype = r.headers.get("Content-Type")
+                with open(path, "wb") as f:
+                    for chunk in r.iter_content(chunk_size):
+                        f.write(chunk)
+            ok = True
+        except Exception:
+            path.unlink(missing_ok=True)
+        return (ok, ctype) if return_type else ok
 
-    
     def get_my_saved_tracks(
         self,
         max_total: Optional[int] = None,
         page_size: int = 50,
+        *,
+        force_refresh: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         Devuelve las canciones guardadas del usuario (Liked Songs) desde /me/tracks.
-        Estructura compatible con get_playlist_tracks():
+        - force_refresh: ignora la caché de pistas (si está activada)
+
+        Estructura compatible con get_playlist_tracks() (added_by siempre None):
             {
-              id, name, duration_ms, is_local, added_at,
+              id, name, duration_ms, is_local, added_at, added_by,
               album: {id, name},
               artists: [{id, name}, ...]
             }
         """
-        endpoint = "/me/tracks"
-        params = {
-            "limit": min(max(page_size, 1), 50),
-            "fields": (
-                "items(added_at,track(id,name,duration_ms,is_local,"
-                "album(id,name),artists(id,name))),next,total"
-            )
-        }
-        tracks: deque = deque(maxlen=max_total)
-        for page in self._paginate(endpoint, params=params):
-            for item in page.get("items", []) or []:
-                t = item.get("track")
-                if not t:
-                    continue
-                artists = t.get("artists") or []
-                tracks.append({
-                    "id": t.get("id"),
-                    "name": t.get("name"),
-                    "duration_ms": t.get("duration_ms"),
-                    "is_local": t.get("is_local"),
-                    "added_at": item.get("added_at"),
-                    "album": {
-                        "id": (t.get("album") or {}).get("id"),
-                        "name": (t.get("album") or {}).get("name"),
-                    },
-                    "artists": [{"id": a.get("id"), "name": a.get("name")} for a in artists],
-                })
-                if max_total is not None and len(tracks) >= max_total:
-                    return tracks[:max_total]
-        return list(reversed(tracks))
+        endpoint = _SAVED_TRACKS_KEY
+        params = {"limit": _clamp_limit(page_size, MAX_LIMIT_SAVED), "fields": _FIELDS_SAVED}
+
+        use_cache = self._tracks_cache is not None and max_total is None
+        first: Optional[Dict[str, Any]] = None
+        version: Optional[str] = None
+        if use_cache:
+            # La primera página hace falta igualmente: sirve de validador
+            first = self.client.api_request("GET", endpoint, dict(params))
+            version = _page_digest(first)
+            if not force_refresh:
+                cached = self._tracks_cache.get(_SAVED_TRACKS_KEY, version)
+                if cached is not None:
+                    return cached
+
+        tracks = list(self.iter_track_rows(endpoint, params, max_total=max_total, first_page=first))
+        # /me/tracks llega de más reciente a más antigua: se devuelve en orden
+        # cronológico (in-place, sin copia), también cuando se corta en max_total
+        tracks.reverse()
+        if use_cache:
+            self._tracks_cache.put(_SAVED_TRACKS_KEY, version, tracks)
+        return tracks
 
     # ------------------------
     # Pistas de una playlist
@@ -155,11 +374,16 @@ class SpotifyLibrary:
         playlist_id: str,
         max_total: Optional[int] = None,
         page_size: int = 100,
+        *,
+        snapshot_id: Optional[str] = None,
+        force_refresh: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         Devuelve las pistas de una playlist, con artistas.
         - max_total: límite total (None => traer todas)
         - page_size: tamaño de página (máx. 100 en /playlists/{id}/tracks)
+        - snapshot_id: el de get_my_playlists(), si se conoce (ahorra una petición)
+        - force_refresh: ignora la caché de pistas (si está activada)
 
         Retorna lista de dicts:
             {
@@ -169,69 +393,240 @@ class SpotifyLibrary:
             }
         """
         endpoint = f"/playlists/{playlist_id}/tracks"
-        params = {
-            "limit": min(max(page_size, 1), 100),
-            # afinamos fields: elementos necesarios + paginación
-            "fields": (
-                "items(added_at, added_by, track(id,name,duration_ms,is_local,"
-                "album(id,name),artists(id,name))),next,total"
+        params = {"limit": _clamp_limit(page_size, MAX_LIMIT_TRACKS), "fields": _FIELDS_TRACKS}
+
+        if self._tracks_cache is None or max_total is not None:
+            return list(self.iter_track_rows(endpoint, params, max_total=max_total))
+
+        first: Optional[Dict[str, Any]] = None
+        if snapshot_id is None:
+            # El objeto playlist trae snapshot_id y la primera página de pistas
+            # en una sola petición: validar la caché no cuesta una petición extra
+            pl = self.client.api_request(
+                "GET",
+                f"/playlists/{playlist_id}",
+                {"fields": f"snapshot_id,tracks({_FIELDS_TRACKS},limit)"},
             )
-        }
+            snapshot_id = pl.get("snapshot_id")
+            first = pl.get("tracks")
+        # Si la playlist no ha cambiado (mismo snapshot_id) no se pagina
+        if not force_refresh:
+            cached = self._tracks_cache.get(playlist_id, snapshot_id)
+            if cached is not None:
+                return cached
 
-        tracks: List[Dict[str, Any]] = []
-
-        for page in self._paginate(endpoint, params=params):
-            for item in page.get("items", []) or []:
-                t = item.get("track")
-                u = item.get("added_by")
-                if not t:
-                    continue  # puede haber items 'vacíos' o eliminados
-                artists = t.get("artists") or []
-                tracks.append({
-                    "id": t.get("id"),
-                    "name": t.get("name"),
-                    "duration_ms": t.get("duration_ms"),
-                    "is_local": t.get("is_local"),
-                    "added_at": item.get("added_at"),
-                    "added_by": u.get("id"),
-                    "album": {
-                        "id": (t.get("album") or {}).get("id"),
-                        "name": (t.get("album") or {}).get("name"),
-                    },
-                    "artists": [{"id": a.get("id"), "name": a.get("name")} for a in artists],
-                })
-                if max_total is not None and len(tracks) >= max_total:
-                    return tracks[:max_total]
+        tracks = list(self.iter_track_rows(endpoint, params, first_page=first))
+        self._tracks_cache.put(playlist_id, snapshot_id, tracks)
         return tracks
 
+    def iter_track_rows(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_total: Optional[int] = None,
+        *,
+        first_page: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Pagina y proyecta en un solo paso: entrega cada fila de pista según
+        llegan las páginas (sin acumularlas). Con `max_total` solo se piden
+        los items necesarios (la última página, recortada), así que no hace
+        falta comprobar el límite fila a fila.
+        Sirve para consumir /playlists/{id}/tracks o /me/tracks de forma perezosa.
+        `first_page`: primera página ya descargada (no se vuelve a pedir).
+        """
+        if max_total is not None and max_total <= 0:
+            return
+        pages = self._paginate_parallel(
+            endpoint, params=params, max_total=max_total, first_page=first_page
+        )
+        for page in pages:
+            for item in page.get("items") or ():
+                row = _track_row(item)
+                if row is not None:
+                    yield row
+
+    async def get_many_playlist_tracks_async(
+        self,
+        playlist_ids: Sequence[str],
+        *,
+        max_concurrency: int = 4,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Descarga las pistas de varias playlists a la vez (máx. `max_concurrency`
+        simultáneas) -> {playlist_id: tracks}, en el orden de entrada.
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def _one(pid: str) -> List[Dict[str, Any]]:
+            async with sem:
+                return await asyncio.to_thread(self.get_playlist_tracks, pid)
+
+        results = await asyncio.gather(*(_one(pid) for pid in playlist_ids))
+        return dict(zip(playlist_ids, results))
+
+    def get_many_playlist_tracks(
+        self,
+        playlist_ids: Sequence[str],
+        *,
+        max_concurrency: int = 4,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Versión síncrona de `get_many_playlist_tracks_async`."""
+        return asyncio.run(
+            self.get_many_playlist_tracks_async(playlist_ids, max_concurrency=max_concurrency)
+        )
+
+    def get_playlist_snapshot_id(self, playlist_id: str) -> Optional[str]:
+        """snapshot_id actual de la playlist (petición mínima con fields=snapshot_id)."""
+        return self.client.api_request(
+            "GET", f"/playlists/{playlist_id}", params={"fields": "snapshot_id"}
+        ).get("snapshot_id")
+
     # ------------------------
     # Helper de paginación
     # ------------------------
-    def _paginate(
+    def _all_pages(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        *,
+        max_total: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Devuelve todas las páginas en orden usando `_paginate_async`.
+        Si ya hay un event loop en marcha en este hilo, usa `_paginate_parallel`.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._paginate_async(endpoint, params, max_total=max_total))
+        return list(self._paginate_parallel(endpoint, params=params, max_total=max_total))
+
+    def _paginate_parallel(
         self,
         endpoint: str,
         params: Optional[Dict[str, Any]] = None,
+        *,
+        max_total: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        first_page: Optional[Dict[str, Any]] = None,
     ) -> Iterator[Dict[str, Any]]:
         """
-        Itera sobre páginas de endpoints de Spotify que devuelven 'next'.
-        Usa client.api_request() para GET sucesivos.
+        Versión síncrona de `_paginate_async`: tras la primera página calcula
+        los offsets con 'total'/'limit' y los pide en un pool de hilos acotado,
+        entregando las páginas en orden. Sin 'total' sigue 'next' en serie.
+        Si se pasa `first_page` (ya descargada) se continúa a partir de ella.
         """
-        url: Optional[str] = None
-        current_params = dict(params or {})
+        base = self._first_page_params(params, max_total)
+        first = first_page if first_page is not None else self.client.api_request("GET", endpoint, base)
+        yield first
 
-        while True:
-            if url is None:
-                # primera llamada por endpoint relativo
-                page = self.client.api_request("GET", endpoint, params=current_params)
-            else:
-                # siguientes llamadas usan URL absoluta 'next'
+        url = first.get("next")
+        if not url:
+            return
+        total = first.get("total")
+        limit = first.get("limit") or base.get("limit")
+        if total is None or not limit:
+            while url:
                 page = self.client.api_request("GET", url)
+                yield page
+                url = page.get("next")
+            return
+        if max_total is not None:
+            total = min(total, max_total)
+
+        urls = self._page_urls(endpoint, base, limit, total)
+        if not urls:
+            return
+        workers = max_workers or self.page_concurrency
+        yield from iter_map_ordered(
+            lambda url: self.client.api_request("GET", url), urls, min(workers, len(urls))
+        )
 
-            yield page
+    @staticmethod
+    def _first_page_params(params: Optional[Dict[str, Any]], max_total: Optional[int]) -> Dict[str, Any]:
+        """Copia de `params`; si `max_total` cabe en una página, la primera pide solo eso."""
+        base = dict(params or {})
+        limit = base.get("limit")
+        if max_total is not None and limit and 0 < max_total < limit:
+            base["limit"] = max_total
+        return base
 
-            url = page.get("next")
-            if not url:
-                break
+    @staticmethod
+    def _page_urls(endpoint: str, params: Dict[str, Any], limit: int, total: int) -> List[str]:
+        """
+        URLs absolutas de las páginas que siguen a la primera hasta `total`
+        (ya recortado a max_total): la última pide solo los items que faltan.
+        La query común se codifica una vez; entre páginas solo cambian
+        'limit' y 'offset'.
+        """
+        qs = urllib.parse.urlencode({k: v for k, v in params.items() if k not in ("limit", "offset")})
+        prefix = f"{SPOTIFY_API_BASE}/{endpoint.lstrip('/')}?{qs}&" if qs else f"{SPOTIFY_API_BASE}/{endpoint.lstrip('/')}?"
+        return [
+            f"{prefix}limit={min(limit, total - off)}&offset={off}"
+            for off in range(limit, total, limit)
+        ]
+
+    async def _paginate_async(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        *,
+        max_total: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Pide la primera página, calcula el resto de offsets a partir de
+        'total'/'limit' y los lanza en paralelo (máx. `max_concurrency`
+        simultáneas para no provocar 429). Devuelve las páginas en orden.
+        """
+        return [
+            page
+            async for page in self._aiter_pages(
+                endpoint, params, max_total=max_total, max_concurrency=max_concurrency
+            )
+        ]
+
+    async def _aiter_pages(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        *,
+        max_total: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Igual que `_paginate_async`, pero entrega cada página (en orden) en
+        cuanto llega: la primera sale antes de lanzar el resto.
+        """
+        base = self._first_page_params(params, max_total)
+        first = await asyncio.to_thread(self.client.api_request, "GET", endpoint, base)
+        yield first
+        if not first.get("next"):
+            return
+
+        total = first.get("total")
+        limit = first.get("limit") or base.get("limit")
+        if total is None or not limit:
+            # Sin 'total' no se pueden calcular offsets: se sigue 'next' en serie
+            url = first.get("next")
+            while url:
+                page = await asyncio.to_thread(self.client.api_request, "GET", url)
+                yield page
+                url = page.get("next")
+            return
+        if max_total is not None:
+            total = min(total, max_total)
+
+        sem = asyncio.Semaphore(max_concurrency or self.page_concurrency)
+
+        async def _page(url: str) -> Dict[str, Any]:
+            async with sem:
+                return await asyncio.to_thread(self.client.api_request, "GET", url)
+
+        tasks = [asyncio.ensure_future(_page(url)) for url in self._page_urls(endpoint, base, limit, total)]
+        for task in tasks:
+            yield await task
 
 
 # ------------------------
@@ -239,8 +634,12 @@ class SpotifyLibrary:
 # ------------------------
 if __name__ == "__main__":
     # Instancia tu cliente autenticado
+    # Los settings solo hacen falta al ejecutar el demo (evita leer .env/entorno al importar)
+    from src.core.settings.spotify_service import get_spotify_settings
     from .spotify_getter import SpotifyUserClient  # ajusta import a tu ruta real
 
+    spotify_settings = get_spotify_settings()
+
     client = SpotifyUserClient(
         client_id=spotify_settings.client_id,
         redirect_uri="http://127.0.0.1:8080/callback",  # o el que tengas en el Dashboard
@@ -14,6 +14,9 @@ Métodos principales:
     - get_current_user()
     - get_user_playlists(limit=50, offset=0)
     - get_playlist_tracks(playlist_id, limit=100, offset=0)
+    - iter_user_playlists() / iter_playlist_tracks(pl) / iter_favorite_tracks()
+      (perezosos, página a página; list_all_* son sus versiones en lista)
+    - list_all_playlist_tracks_fast(pl): todas las páginas en paralelo (playlists grandes)
     - create_playlist(title, description="")
     - add_tracks_to_playlist(playlist_id, track_ids)
     - search_tracks(query, limit=20, offset=0)
@@ -25,25 +28,115 @@ Limitaciones:
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import time
 import base64
+from datetime import datetime
 import tidalapi
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from tidalapi import Session
-from typing import Any, Dict, List, Iterable
+from typing import Any, Callable, Dict, List, Iterable, Iterator, Optional
+from urllib3.util.retry import Retry
 
 from src.db.blob_handler import BlobHandler
 
 
+def _playlist_to_dict(p) -> Dict[str, Any]:
+    return {
+        "id": getattr(p, "id", None),
+        "p": p,
+        "title": getattr(p, "name", None) or getattr(p, "title", None),
+        "description": getattr(p, "description", None),
+        "items_count": getattr(p, "num_tracks", None) or getattr(p, "numberOfTracks", None),
+    }
+
+
+def _as_int(t: Any) -> Optional[int]:
+    """int tal cual; str con dígitos -> int; cualquier otra cosa -> None."""
+    if isinstance(t, int):
+        return t
+    if isinstance(t, str):
+        t = t.strip()
+        if t.isdigit():
+            return int(t)
+    return None
+
+
+def _normalize_track_ids(track_ids: Optional[Iterable[Any]]) -> List[int]:
+    """IDs válidos como int, sin duplicados y en orden, en una sola pasada."""
+    return [tid for tid in dict.fromkeys(map(_as_int, track_ids or ())) if tid is not None]
+
+
+# Getters en C para los atributos de Track/Artist de tidalapi
+_TRACK_FIELDS = attrgetter("id", "name", "duration", "album", "artists")
+_ARTIST_FIELDS = attrgetter("id", "name")
+
+
+def _track_to_dict(t) -> Dict[str, Any]:
+    """Salida homogénea: {id, title, duration, album:{id,title}, artists:[{id,name}]}."""
+    # Camino rápido: objetos Track de tidalapi con todos sus atributos
+    try:
+        tid, name, duration, album, artists = _TRACK_FIELDS(t)
+        artists_out = [{"id": aid, "name": aname} for aid, aname in map(_ARTIST_FIELDS, artists or ())]
+    except AttributeError:
+        return _track_to_dict_compat(t)
+    return {
+        "id": tid,
+        "title": name or getattr(t, "title", None),
+        "duration": duration,
+        "album": {
+            "id": getattr(album, "id", None),
+            "title": getattr(album, "name", None) or getattr(album, "title", None),
+        },
+        "artists": artists_out,
+    }
+
+
+def _track_to_dict_compat(t) -> Dict[str, Any]:
+    """Como `_track_to_dict`, tolerando objetos a los que les falten atributos."""
+    artists = []
+    try:
+        for a in getattr(t, "artists", []) or []:
+            artists.append({"id": getattr(a, "id", None), "name": getattr(a, "name", None)})
+    except Exception:
+        pass
+    album = getattr(t, "album", None)
+    return {
+        "id": getattr(t, "id", None),
+        "title": getattr(t, "name", None) or getattr(t, "title", None),
+        "duration": getattr(t, "duration", None),
+        "album": {
+            "id": getattr(album, "id", None),
+            "title": getattr(album, "name", None) or getattr(album, "title", None),
+        },
+        "artists": artists,
+    }
+
+
 class TidalUserClient:
     session : Session
     user_name : str
     blob_handler : BlobHandler
 
-    def __init__(self, user_name : str = "Unai") -> None:
+    TOKEN_REFRESH_AHEAD_S = 300  # renueva el token si caduca antes de esto
+
+    def __init__(self, user_name : str = "Unai", token_data: Optional[Dict[str, Any]] = None) -> None:
         self.session = tidalapi.Session()
+        self._mount_connection_pool()
         self.user_name = user_name
         self.blob_handler = BlobHandler()
+        # Token ya descargado (p.ej. con BlobHandler.get_tidal_tokens_many)
+        self._token_data = token_data
+        self._expires_at: Optional[float] = None
+        # Objetos de tidalapi estables durante la sesión (cada uno cuesta un GET)
+        self._pl_cache: Dict[str, Any] = {}
+        self._fav_cache = None
+        # Firma de búsqueda de tidalapi que funciona (se descubre en la primera)
+        self._search_variant: Optional[int] = None
 
     # ------------------------
     # Autenticación
@@ -54,8 +147,13 @@ class TidalUserClient:
           1) Intenta cargar token OAuth desde disco
           2) Si falla o no es válido, hace device-login y guarda la sesión
         """
-        # 1) Intentar cargar sesión previa
+        # Un (re)login invalida los objetos cacheados de la sesión anterior
+        self._pl_cache.clear()
+        self._fav_cache = None
+
+        # 1) Intentar cargar sesión previa (renovándola si está a punto de caducar)
         if self._load_oauth_if_possible() and self._is_logged():
+            self._refresh_if_expiring()
             return
 
         # 2) Device login (acepta bool/dict/None según versión)
@@ -67,56 +165,67 @@ class TidalUserClient:
         # 3) Guardar sesión si es posible
         self._save_oauth_if_possible()
 
+    async def authenticate_async(self) -> None:
+        """Versión asíncrona de authenticate(): ejecuta el login en un hilo."""
+        await asyncio.to_thread(self.authenticate)
+
+
+    def iter_user_playlists(self, page_size: int = 50) -> Iterator[Dict[str, Any]]:
+        """Recorre las playlists del usuario página a página (perezoso)."""
+        self._ensure_logged()
+        for p in self._iter_paged(self.session.user.playlists, page_size):
+            yield _playlist_to_dict(p)
 
     def list_all_user_playlists(self) -> List[Dict[str, Any]]:
         """Devuelve TODAS las playlists del usuario (internamente puede paginar)."""
-        self._ensure_logged()
-        user = self.session.user
-        try:
-            playlists_iter = user.playlists()      # algunas versiones: método
-        except TypeError:
-            playlists_iter = user.playlists        # otras: propiedad iterable
-        pls = list(playlists_iter)                 # fuerza a traerlas todas
-
-        out = []
-        for p in pls:
-            out.append({
-                "id": getattr(p, "id", None),
-                "p":p,
-                "title": getattr(p, "name", None) or getattr(p, "title", None),
-                "description": getattr(p, "description", None),
-                "items_count": getattr(p, "num_tracks", None) or getattr(p, "numberOfTracks", None),
-            })
-        return out
+        return list(self.iter_user_playlists())
 
+    def iter_playlist_tracks(self, pl, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Recorre las pistas de una playlist página a página (perezoso)."""
+        self._ensure_logged()
+        for t in self._iter_paged(pl.tracks, page_size):
+            yield _track_to_dict(t)
 
     def list_all_playlist_tracks(self, pl) -> List[Dict[str, Any]]:
         """Devuelve TODAS las pistas de una playlist (internamente puede paginar)."""
+        return list(self.iter_playlist_tracks(pl))
+
+    def list_all_playlist_tracks_fast(
+        self, pl, concurrency: int = 8, page_size: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Como `list_all_playlist_tracks`, pero para playlists grandes: con el nº
+        de pistas de la playlist (num_tracks) pide todas las páginas a la vez
+        (máx. `concurrency`) y las une en orden. Si no se conoce el total o la
+        versión no pagina, usa el recorrido normal.
+        """
         self._ensure_logged()
+        total = getattr(pl, "num_tracks", None) or getattr(pl, "numberOfTracks", None)
+        if not isinstance(total, int) or total <= page_size:
+            return self.list_all_playlist_tracks(pl)
+
+        def fetch(offset: int) -> List[Any]:
+            return list(pl.tracks(limit=page_size, offset=offset))
+
         try:
-            tracks_iter = pl.tracks()   # método
+            first = fetch(0)
         except TypeError:
-            tracks_iter = pl.tracks     # propiedad
-        tracks = list(tracks_iter)
-
-        out = []
-        for t in tracks:
-            artists = []
-            for a in getattr(t, "artists", []) or []:
-                artists.append({"id": getattr(a, "id", None), "name": getattr(a, "name", None)})
-            out.append({
-                "id": getattr(t, "id", None),
-                "title": getattr(t, "name", None) or getattr(t, "title", None),
-                "duration": getattr(t, "duration", None),
-                "album": {
-                    "id": getattr(getattr(t, "album", None), "id", None),
-                    "title": getattr(getattr(t, "album", None), "name", None) or getattr(getattr(t, "album", None), "title", None),
-                },
-                "artists": artists,
-            })
+            return self.list_all_playlist_tracks(pl)
+        out = [_track_to_dict(t) for t in first]
+        offsets = range(page_size, total, page_size)
+        last: List[Any] = first
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(offsets)))) as ex:
+            for page in ex.map(fetch, offsets):
+                out.extend(map(_track_to_dict, page))
+                last = page
+        # num_tracks puede estar desfasado: si la última página vino llena, se sigue en serie
+        if len(last) >= page_size:
+            out.extend(map(_track_to_dict, self._iter_paged(pl.tracks, page_size, offset=offsets[-1] + page_size)))
         return out
 
-
+    def is_authenticated(self) -> bool:
+        """True si la sesión sigue operativa (p.ej. para reutilizar el cliente)."""
+        return self._is_logged()
 
     # --- helpers de login ---
     def _is_logged(self) -> bool:
@@ -190,40 +299,16 @@ class TidalUserClient:
         self._ensure_logged()
         user = self.session.user
         pls = user.playlists(limit=limit, offset=offset)
-        out: List[Dict[str, Any]] = []
-        for p in pls:
-            out.append({
-                "id": getattr(p, "id", None),
-                "title": getattr(p, "name", None) or getattr(p, "title", None),
-                "description": getattr(p, "description", None),
-                "items_count": getattr(p, "num_tracks", None) or getattr(p, "numberOfTracks", None),
-            })
-        return out
+        return [_playlist_to_dict(p) for p in pls]
 
     def get_playlist_tracks(self, playlist_id: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Devuelve las pistas de una playlist (id)."""
         self._ensure_logged()
-        pl = tidalapi.playlist.Playlist(self.session, playlist_id)
+        pl = self._pl_cache.get(playlist_id)
+        if pl is None:
+            pl = self._pl_cache[playlist_id] = tidalapi.playlist.Playlist(self.session, playlist_id)
         tracks = pl.tracks(limit=limit, offset=offset)
-        out: List[Dict[str, Any]] = []
-        for t in tracks:
-            artists = []
-            try:
-                for a in getattr(t, "artists", []) or []:
-                    artists.append({"id": getattr(a, "id", None), "name": getattr(a, "name", None)})
-            except Exception:
-                pass
-            out.append({
-                "id": getattr(t, "id", None),
-                "title": getattr(t, "name", None) or getattr(t, "title", None),
-                "duration": getattr(t, "duration", None),
-                "album": {
-                    "id": getattr(getattr(t, "album", None), "id", None),
-                    "title": getattr(getattr(t, "album", None), "name", None) or getattr(getattr(t, "album", None), "title", None),
-                },
-                "artists": artists,
-            })
-        return out
+        return [_track_to_dict(t) for t in tracks]
 
     def create_playlist(self, title: str, description: str = ""):
         """Crea una playlist en la cuenta del usuario."""
@@ -238,23 +323,17 @@ class TidalUserClient:
         """Añade una lista de track IDs a una playlist."""
         self._ensure_logged()
 
-        # Normaliza IDs (acepta int/str con dígitos) y descarta valores vacíos
-        norm_ids: List[int] = []
-        for t in track_ids or []:
-            if isinstance(t, int):
-                norm_ids.append(t)
-            elif isinstance(t, str) and t.strip().isdigit():
-                norm_ids.append(int(t.strip()))
-
+        # Normaliza IDs (acepta int/str con dígitos), descarta valores vacíos
+        # y elimina duplicados preservando orden, en una sola pasada
+        norm_ids = _normalize_track_ids(track_ids)
         if not norm_ids:
             return  # nada que hacer
 
-        # Elimina duplicados preservando orden
-        norm_ids = self._dedupe_preserve_order(norm_ids)
 
-
-        # Enviar en lotes por seguridad (p.ej., 100 por petición)
-        BATCH_SIZE = 50
+        # Enviar en lotes de 100 (lo que tidalapi manda por petición). Los lotes
+        # van en serie a propósito: cada inserción lleva el ETag de la playlist
+        # (If-None-Match) y en paralelo chocarían (412) y perderían el orden
+        BATCH_SIZE = 100
         for i in range(0, len(norm_ids), BATCH_SIZE):
             chunk = norm_ids[i:i + BATCH_SIZE]
             try:
@@ -349,94 +428,90 @@ class TidalUserClient:
     def _get_favorites_obj(self):
         """
         Devuelve el objeto de 'favoritos' del usuario, tolerando diferencias de versión.
+        Se resuelve una vez por sesión.
         """
         self._ensure_logged()
+        if self._fav_cache is not None:
+            return self._fav_cache
         user = self.session.user
         fav = getattr(user, "favorites", None)
         if fav is not None:
+            self._fav_cache = fav
             return fav
         # Fallback común en versiones antiguas:
         try:
             Favorites = getattr(tidalapi, "Favorites", None)
             if Favorites is not None:
-                return Favorites(self.session, getattr(user, "id", None))
+                self._fav_cache = Favorites(self.session, getattr(user, "id", None))
+                return self._fav_cache
         except Exception:
             pass
         raise RuntimeError("No se pudo acceder a los favoritos del usuario en 'tidalapi'.")
 
+    def iter_favorite_tracks(self, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Recorre las canciones favoritas del usuario página a página (perezoso)."""
+        fav = self._get_favorites_obj()
+        for t in self._iter_paged(fav.tracks, page_size):
+            yield _track_to_dict(t)
+
     def list_all_favorite_tracks(self) -> List[Dict[str, Any]]:
         """
         Devuelve TODAS las canciones marcadas como favoritas del usuario.
         Estructura homogénea: {id, title, duration, album:{id,title}, artists:[{id,name}]}
         """
-        fav = self._get_favorites_obj()
-        try:
-            tracks_iter = fav.tracks()   # método habitual
-        except TypeError:
-            tracks_iter = fav.tracks     # propiedad iterable
-        tracks = list(tracks_iter or [])
-
-        out = []
-        for t in tracks:
-            artists = []
-            for a in getattr(t, "artists", []) or []:
-                artists.append({"id": getattr(a, "id", None), "name": getattr(a, "name", None)})
-            out.append({
-                "id": getattr(t, "id", None),
-                "title": getattr(t, "name", None) or getattr(t, "title", None),
-                "duration": getattr(t, "duration", None),
-                "album": {
-                    "id": getattr(getattr(t, "album", None), "id", None),
-                    "title": getattr(getattr(t, "album", None), "name", None) or getattr(getattr(t, "album", None), "title", None),
-                },
-                "artists": artists,
-            })
-        return out
+        return list(self.iter_favorite_tracks())
 
-    def add_favorite_tracks(self, track_ids: List[int]) -> None:
+    def add_favorite_tracks(self, track_ids: List[int], max_workers: int = 8) -> None:
         """
         Marca como favoritas las pistas indicadas. Hace de-duplicado básico y
-        añade una a una (algunas versiones de tidalapi no soportan lote).
+        añade una a una (algunas versiones de tidalapi no soportan lote), con
+        hasta `max_workers` peticiones simultáneas. En paralelo el orden
+        relativo de alta dentro de la llamada no está garantizado
+        (max_workers=1 lo conserva).
         """
         self._ensure_logged()
         fav = self._get_favorites_obj()
 
         # Normaliza y de-dup
-        norm_ids: List[int] = []
-        for t in track_ids or []:
-            if isinstance(t, int):
-                norm_ids.append(t)
-            elif isinstance(t, str) and t.strip().isdigit():
-                norm_ids.append(int(t.strip()))
+        norm_ids = _normalize_track_ids(track_ids)
         if not norm_ids:
             return
-        seen = set()
-        norm_ids = [x for x in norm_ids if not (x in seen or seen.add(x))]
 
-        # Añadir uno a uno (API suele ser add_track(id))
-        for tid in norm_ids:
+        add_one = self._favorite_adder(fav)
+
+        # Peticiones independientes (API suele ser add_track(id)): se solapan
+        # en un pool de hilos y los fallos se agregan al final
+        errors: List[str] = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(norm_ids)))) as ex:
+            futures = {ex.submit(add_one, tid): tid for tid in norm_ids}
+            for fut in as_completed(futures):
+                try:
+                    fut.result()
+                except Exception as e:
+                    errors.append(f"track_id={futures[fut]}: {e}")
+        if errors:
+            raise RuntimeError(
+                f"Fallo al añadir {len(errors)}/{len(norm_ids)} favoritos: " + "; ".join(errors)
+            )
+
+    @staticmethod
+    def _favorite_adder(fav) -> Callable[[int], Any]:
+        """Resuelve una vez (no por pista) cómo añade favoritos esta versión de tidalapi."""
+        add_track = getattr(fav, "add_track", None)
+        if callable(add_track):
+            return add_track
+        add = getattr(fav, "add", None)
+        if not callable(add):
+            raise RuntimeError("El objeto 'favorites' no expone add_track/add.")
+
+        def add_one(tid: int) -> Any:
+            # algunas versiones aceptan add(track_id) o add([ids])
             try:
-                if hasattr(fav, "add_track"):
-                    fav.add_track(tid)
-                elif hasattr(fav, "add"):
-                    # algunas versiones aceptan add(track_id) o add([ids])
-                    try:
-                        fav.add(tid)
-                    except TypeError:
-                        fav.add([tid])
-                else:
-                    raise RuntimeError("El objeto 'favorites' no expone add_track/add.")
-            except Exception as e:
-                raise RuntimeError(f"Fallo al añadir favorito (track_id={tid}): {e}") from e
-                  
-    def _dedupe_preserve_order(self, ids: Iterable[int]) -> List[int]:
-        seen = set()
-        out = []
-        for x in ids:
-            if x not in seen:
-                seen.add(x)
-                out.append(x)
-        return out
+                return add(tid)
+            except TypeError:
+                return add([tid])
+
+        return add_one
 
 
     # ------------------------
@@ -447,35 +522,17 @@ class TidalUserClient:
         Soporta varias firmas de 'tidalapi' (enum/bool/dict)."""
         self._ensure_logged()
 
-        # 1) Intenta con el enum SearchType.TRACKS (versiones nuevas)
+        # La firma que funcionó la primera vez se recuerda: es estable para
+        # la versión instalada de tidalapi y así no se reintentan las demás
         res = None
-        try:
-            from tidalapi import media  # type: ignore
-            if hasattr(media, "SearchType"):
-                try:
-                    res = self.session.search(media.SearchType.TRACKS, query, limit=limit, offset=offset)
-                except TypeError:
-                    # algunas builds usan 'top_level' en vez de offset
-                    res = self.session.search(media.SearchType.TRACKS, query, limit=limit, top_level=offset)
-        except Exception:
-            pass
-
-        # 2) Intenta con la API antigua string ("tracks")
-        if res is None:
-            try:
-                res = self.session.search("tracks", query, limit=limit, offset=offset)
-            except Exception:
-                pass
-
-        # 3) Intenta con la variante basada en modelos (muy antigua)
+        if self._search_variant is not None:
+            res = self._search_with(self._search_variant, query, limit, offset)
         if res is None:
-            try:
-                # algunas versiones aceptan: search(query, models=[tidalapi.Track], ...)
-                TrackModel = getattr(tidalapi, "Track", None)
-                if TrackModel is not None:
-                    res = self.session.search(query, models=[TrackModel], limit=limit, offset=offset)
-            except Exception:
-                pass
+            for variant in range(3):
+                res = self._search_with(variant, query, limit, offset)
+                if res is not None:
+                    self._search_variant = variant
+                    break
 
         if res is None:
             raise RuntimeError("No se pudo realizar la búsqueda: la versión de 'tidalapi' no soporta ninguna firma conocida.")
@@ -492,30 +549,105 @@ class TidalUserClient:
             tracks = res.get("tracks", []) or []
 
         # Convertir a salida homogénea
-        out: List[Dict[str, Any]] = []
-        for t in tracks:
-            artists = []
+        return [_track_to_dict(t) for t in tracks]
+
+
+    def _search_with(self, variant: int, query: str, limit: int, offset: int) -> Any:
+        """Lanza la búsqueda con una de las firmas conocidas de tidalapi; None si no vale."""
+        # 1) Enum SearchType.TRACKS (versiones nuevas)
+        if variant == 0:
             try:
-                for a in getattr(t, "artists", []) or []:
-                    artists.append({"id": getattr(a, "id", None), "name": getattr(a, "name", None)})
+                from tidalapi import media  # type: ignore
+                if hasattr(media, "SearchType"):
+                    try:
+                        return self.session.search(media.SearchType.TRACKS, query, limit=limit, offset=offset)
+                    except TypeError:
+                        # algunas builds usan 'top_level' en vez de offset
+                        return self.session.search(media.SearchType.TRACKS, query, limit=limit, top_level=offset)
             except Exception:
                 pass
-            out.append({
-                "id": getattr(t, "id", None),
-                "title": getattr(t, "name", None) or getattr(t, "title", None),
-                "duration": getattr(t, "duration", None),
-                "album": {
-                    "id": getattr(getattr(t, "album", None), "id", None),
-                    "title": getattr(getattr(t, "album", None), "name", None) or getattr(getattr(t, "album", None), "title", None),
-                },
-                "artists": artists,
-            })
-        return out
+            return None
 
+        # 2) API antigua string ("tracks")
+        if variant == 1:
+            try:
+                return self.session.search("tracks", query, limit=limit, offset=offset)
+            except Exception:
+                return None
+
+        # 3) Variante basada en modelos: search(query, models=[tidalapi.Track], ...)
+        try:
+            TrackModel = getattr(tidalapi, "Track", None)
+            if TrackModel is not None:
+                return self.session.search(query, models=[TrackModel], limit=limit, offset=offset)
+        except Exception:
+            pass
+        return None
 
     # ------------------------
     # Helpers internos
     # ------------------------
+    def _mount_connection_pool(self) -> None:
+        """
+        Monta un pool de conexiones keep-alive (con reintentos ante 429/5xx)
+        en el requests.Session interno de tidalapi: todas sus llamadas
+        reutilizan la conexión TLS en vez de abrir una por petición.
+        """
+        req_session = getattr(self.session, "request_session", None)
+        if req_session is None:
+            return
+        req_session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=64,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.3,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                ),
+            ),
+        )
+
+    @staticmethod
+    def _iter_paged(source: Any, page_size: int, offset: int = 0) -> Iterator[Any]:
+        """
+        Recorre un listado de tidalapi pidiendo `limit`/`offset` página a
+        página hasta una página incompleta. Mientras se entrega la página N,
+        la N+1 ya se está pidiendo en segundo plano (una sola en vuelo).
+        Si la versión no admite paginar (o `source` es una propiedad
+        iterable), lo recorre entero de una vez. `offset`: desde dónde empezar.
+        """
+        def fetch(off: int) -> List[Any]:
+            return list(source(limit=page_size, offset=off))
+
+        try:
+            page = fetch(offset)
+        except TypeError:
+            if offset:
+                raise
+            try:
+                items = source()      # método sin paginación
+            except TypeError:
+                items = source        # propiedad iterable
+            yield from items or []
+            return
+
+        ex = ThreadPoolExecutor(max_workers=1)
+        try:
+            while True:
+                nxt = ex.submit(fetch, offset + page_size) if len(page) >= page_size else None
+                yield from page
+                if nxt is None:
+                    return
+                page = nxt.result()
+                offset += page_size
+        finally:
+            # Si el consumidor para antes (p.ej. find_playlist), no se espera a la prefetch
+            ex.shutdown(wait=False, cancel_futures=True)
+
     def _ensure_logged(self) -> None:
         try:
             _ = self.session.user
@@ -524,8 +656,12 @@ class TidalUserClient:
 
     def _load_oauth_if_possible(self) -> bool:
         """Carga sesión OAuth desde disco si la versión de tidalapi lo soporta."""
-        
-        data = self.blob_handler.get_tidal_tokens(user_name=self.user_name)
+        data = self._token_data
+        if data is None:
+            data = self.blob_handler.get_tidal_tokens(user_name=self.user_name)
+        # Copia: el dict puede venir de la caché compartida de BlobHandler
+        data = dict(data)
+        self._expires_at = data.pop("expires_at", None)
 
         # Algunas versiones exponen 'load_oauth_session'
         if hasattr(self.session, "load_oauth_session"):
@@ -565,12 +701,36 @@ class TidalUserClient:
             # No pasa nada; iniciarás login la próxima vez.
             return
 
+        # Caducidad en epoch (serializable) para poder renovar por adelantado
+        payload = dict(payload)
+        expiry = getattr(self.session, "expiry_time", None)
+        if isinstance(expiry, datetime):
+            payload["expires_at"] = expiry.timestamp()
+            self._expires_at = payload["expires_at"]
 
-    
-        
+        # put_object de S3 es atómico: nunca queda un token a medio escribir
         self.blob_handler.put_tidal_token_dict(self.user_name, payload)
-            
-    
+
+    def _refresh_if_expiring(self) -> None:
+        """
+        Si el access token caduca en menos de TOKEN_REFRESH_AHEAD_S, lo renueva
+        ya (y lo guarda) en vez de esperar a que un 401 corte un lote.
+        """
+        expires_at = self._expires_at
+        if not isinstance(expires_at, (int, float)):
+            return
+        if expires_at - time.time() >= self.TOKEN_REFRESH_AHEAD_S:
+            return
+        refresh_token = getattr(self.session, "refresh_token", None)
+        token_refresh = getattr(self.session, "token_refresh", None)
+        if not refresh_token or not callable(token_refresh):
+            return
+        try:
+            if token_refresh(refresh_token):
+                self._save_oauth_if_possible()
+        except Exception:
+            # Sin renovación anticipada tidalapi lo reintentará ante el 401
+            pass
 
 
 # ------------------------
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 from .tidal_client import TidalUserClient
+from src.utils.concurrency import iter_map_ordered
 import base64
 
 
+_WS_RE = re.compile(r"\s+")
+_TOKEN_SPLIT_RE = re.compile(r"[^\w]+")
+
+
+def normalize_playlist_title(title: Optional[str]) -> str:
+    """Título de playlist comparable (sin espacios en los extremos, minúsculas)."""
+    return (title or "").strip().lower()
+
+
 class TidalLibrary:
     """
     Capa de conveniencia sobre TidalUserClient.
@@ -14,7 +24,9 @@ class TidalLibrary:
     Métodos principales:
       - search_tracks(query|track+artist)
       - find_best_match(track, artist) -> track_id
-      - create_playlist / get_or_create_playlist
+      - find_best_matches_batch([(track, artist), ...]) -> [(track_id, score, info), ...]
+      - iter_best_matches(...) -> igual, pero en streaming
+      - create_playlist / find_playlist / get_or_create_playlist
       - list_playlist_track_ids
       - add_tracks_by_ids
       - add_tracks_by_metadata(songs=[{track, artist}], pick_strategy="best")
@@ -52,7 +64,7 @@ class TidalLibrary:
         return self.client.search_tracks(query, limit=limit, offset=offset)
 
     def list_favorite_track_ids(self) -> List[int]:
-        items = self.client.list_all_favorite_tracks()
+        items = self.client.iter_favorite_tracks()
         out: List[int] = []
         for t in items:
             if t.get("id") is not None:
@@ -122,25 +134,32 @@ class TidalLibrary:
     
     # Heurística de puntuación 0..100 sobre un item devuelto por TIDAL
     def score_candidate(self, track: str, artist: Optional[str], item: Dict[str, Any]) -> int:
-        def _n(s: Optional[str]) -> str:
-            if not s:
-                return ""
-            s = s.lower()
-            s = re.sub(r"\s+", " ", s).strip()
-            return s
-
-        title = _n(item.get("title"))
-        channel = _n(", ".join(a.get("name", "") for a in (item.get("artists", []) or []) if a.get("name") != None))
-        ntrack = _n(track)
-        nartist = _n(artist)
+        return self._score_prepared(self._prepare_query(track, artist), item)
+
+    @staticmethod
+    def _norm(s: Optional[str]) -> str:
+        if not s:
+            return ""
+        return _WS_RE.sub(" ", s.lower()).strip()
+
+    def _prepare_query(self, track: str, artist: Optional[str]) -> Tuple[str, str, List[str]]:
+        """Normaliza la consulta una sola vez: (ntrack, nartist, tokens de ntrack)."""
+        ntrack = self._norm(track)
+        nartist = self._norm(artist)
+        toks = [t for t in _TOKEN_SPLIT_RE.split(ntrack) if t]
+        return ntrack, nartist, toks
+
+    def _score_prepared(self, query: Tuple[str, str, List[str]], item: Dict[str, Any]) -> int:
+        ntrack, nartist, toks = query
+        title = self._norm(item.get("title"))
+        channel = self._norm(", ".join(a.get("name", "") for a in (item.get("artists", []) or []) if a.get("name") != None))
 
         score = 0
         # Coincidencia con el título
         if ntrack and ntrack in title:
             score += 55
         else:
-            toks = [t for t in re.split(r"[^\w]+", ntrack) if t]
-            hits = sum(1 for t in toks if t and t in title)
+            hits = sum(1 for t in toks if t in title)
             score += min(35, 7 * hits)
 
         # Coincidencia con artista(s)
@@ -170,9 +189,9 @@ class TidalLibrary:
         items = self.search_tracks(query=query, track=track, artist=artist, limit=limit, offset=offset)
         if not items:
             return None
-        base_track = track or (query or "")
+        prepared = self._prepare_query(track or (query or ""), artist)
         for it in items:
-            it["_score"] = self.score_candidate(base_track, artist, it)
+            it["_score"] = self._score_prepared(prepared, it)
         items.sort(key=lambda x: x.get("_score", 0), reverse=True)
         return items
 
@@ -210,6 +229,39 @@ class TidalLibrary:
         }
         return best.get("id"), int(best.get("_score", 0)), info
 
+    def find_best_matches_batch(
+        self,
+        queries: Sequence[Tuple[str, Optional[str]]],
+        *,
+        limit: int = 20,
+        max_workers: int = 10,
+    ) -> List[Tuple[Optional[int], int, Optional[Dict[str, Any]]]]:
+        """
+        Resuelve varias (track, artist) a la vez. Las búsquedas se lanzan en
+        paralelo (máx. `max_workers` simultáneas) y el resultado respeta el
+        orden de entrada: [(track_id, score, info_resumida), ...].
+        """
+        return list(self.iter_best_matches(queries, limit=limit, max_workers=max_workers))
+
+    def iter_best_matches(
+        self,
+        queries: Sequence[Tuple[str, Optional[str]]],
+        *,
+        limit: int = 20,
+        max_workers: int = 10,
+    ) -> Iterator[Tuple[Optional[int], int, Optional[Dict[str, Any]]]]:
+        """
+        Como `find_best_matches_batch`, pero entrega cada resultado (en orden)
+        en cuanto está listo, mientras el resto de búsquedas siguen en curso.
+        """
+        if not queries:
+            return
+
+        def _one(q: Tuple[str, Optional[str]]):
+            return self.find_best_match_with_score(track=q[0], artist=q[1], limit=limit)
+
+        yield from iter_map_ordered(_one, queries, min(max_workers, len(queries)))
+
     # -------------------------------
     # PLAYLISTS
     # -------------------------------
@@ -217,37 +269,42 @@ class TidalLibrary:
         """Crea playlist usando el cliente base."""
         return self.client.create_playlist(title, description)
 
-    def get_or_create_playlist(self, title: str, description: str = "") -> Dict[str, Any]:
+    def find_playlist(self, title: str):
         """
-        Busca por nombre exacto entre playlists del usuario;
-        ahora usa `list_all_user_playlists()` en lugar de paginar manualmente.
+        Busca por nombre exacto entre playlists del usuario (una sola pasada
+        por `iter_user_playlists()`, que para en cuanto la encuentra);
+        devuelve el objeto playlist o None.
         """
-        playlists = self.client.list_all_user_playlists()
-        title_norm = title.strip().lower()
+        playlists = self.client.iter_user_playlists()
+        title_norm = normalize_playlist_title(title)
         for p in playlists:
-            if (p.get("title") or "").strip().lower() == title_norm:
+            if normalize_playlist_title(p.get("title")) == title_norm:
                 return p.get("p", None)
-        return self.create_playlist(title, description)
-    
-    def check_playlist(self, title: str, description: str = "") -> Dict[str, Any]:
+        return None
+
+    def list_playlist_titles(self) -> Set[str]:
+        """Títulos (normalizados) de todas las playlists del usuario, en una pasada."""
+        return {normalize_playlist_title(p.get("title")) for p in self.client.iter_user_playlists()}
+
+    def get_or_create_playlist(self, title: str, description: str = "") -> Dict[str, Any]:
         """
-        Busca por nombre exacto entre playlists del usuario;
-        ahora usa `list_all_user_playlists()` en lugar de paginar manualmente.
+        Busca por nombre (vía `find_playlist()`, que recorre `iter_user_playlists()`
+        y para en la primera coincidencia) y la crea si no existe.
         """
-        playlists = self.client.list_all_user_playlists()
-        title_norm = title.strip().lower()
-        for p in playlists:
-            if (p.get("title") or "").strip().lower() == title_norm:
-                return True
-        return False
+        pl = self.find_playlist(title)
+        return pl if pl is not None else self.create_playlist(title, description)
+    
+    def check_playlist(self, title: str, description: str = "") -> bool:
+        """Indica si existe una playlist del usuario con ese nombre exacto."""
+        return self.find_playlist(title) is not None
             
 
     def list_playlist_track_ids(self, pl) -> List[int]:
         """
-        Devuelve todos los track IDs de una playlist usando `list_all_playlist_tracks()`
-        (sin limit/offset).
+        Devuelve todos los track IDs de una playlist; las páginas se piden en
+        paralelo con `list_all_playlist_tracks_fast()`.
         """
-        items = self.client.list_all_playlist_tracks(pl)
+        items = self.client.list_all_playlist_tracks_fast(pl)
         out: List[int] = []
         for t in items:
             if t.get("id") is not None:
@@ -256,7 +313,7 @@ class TidalLibrary:
 
     def list_playlist_tracks_map(self, pl) -> Dict[int, Dict[str, str]]:
         """Devuelve track_id -> {title, artist} para una playlist."""
-        items = self.client.list_all_playlist_tracks(pl)
+        items = self.client.iter_playlist_tracks(pl)
         out: Dict[int, Dict[str, str]] = {}
         for t in items:
             track_id = t.get("id")
@@ -315,15 +372,16 @@ class TidalLibrary:
         No inserta; resuelve cada (track,artist) y devuelve un plan:
         [ { track, artist, tidal_id, score, title, artists, low_confidence }, ... ]
         """
-        plan: List[Dict[str, Any]] = []
+        queries: List[Tuple[str, Optional[str]]] = []
         for s in songs:
             track = (s.get("track") or "").strip()
             artist = (s.get("artist") or "").strip() or None
-            if not track:
-                continue
-            tid, score, info = self.find_best_match_with_score(
-                track=track, artist=artist, limit=per_query_limit
-            )
+            if track:
+                queries.append((track, artist))
+
+        plan: List[Dict[str, Any]] = []
+        results = self.find_best_matches_batch(queries, limit=per_query_limit)
+        for (track, artist), (tid, score, info) in zip(queries, results):
             plan.append({
                 "track": track,
                 "artist": artist,
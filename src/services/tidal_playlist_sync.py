@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Set
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from src.db.dynamo_handler import DynamoHandler
 from src.core.settings.tidal_sync_service import get_tidal_sync_settings
@@ -15,7 +16,7 @@ class TidalPlaylistsSynchronizer:
     Depende de:
       - Dos instancias autenticadas de TidalLibrary (user A y user B).
 
-    Flujo (modo `run()`):
+    Flujo (`run()`, o `run_async()` desde código asíncrono):
       1) Lista las playlists de ambos usuarios.
       2) Calcula los nombres de playlists que existen en las dos cuentas.
       3) Para cada playlist común:
@@ -32,6 +33,7 @@ class TidalPlaylistsSynchronizer:
     Parámetros:
       - avoid_duplicates: bool (por defecto True) → delega en TidalLibrary.add_tracks_by_ids
       - ask_per_playlist: bool (por defecto True) → pedir confirmación por playlist
+      - rate_limit: int (por defecto 10) → máx. llamadas concurrentes a TIDAL en `run_async()`
     """
 
     def __init__(
@@ -43,6 +45,7 @@ class TidalPlaylistsSynchronizer:
         ask_per_playlist: bool = True,
         dynamo_handler: Optional[DynamoHandler] = None,
         playlist_name: Optional[str] = None,
+        rate_limit: int = 10,
     ) -> None:
         self.tidal_a = tidal_a
         self.tidal_b = tidal_b
@@ -51,18 +54,39 @@ class TidalPlaylistsSynchronizer:
         self.dynamo_handler = dynamo_handler
         sync_settings = get_tidal_sync_settings()
         self.playlist_name = playlist_name or sync_settings.playlist_name or None
+        self.rate_limit = rate_limit
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop: Optional[asyncio.AbstractEventLoop] = None
 
     def run(self) -> None:
+        """Versión síncrona de `run_async()` (no llamar con un event loop en marcha)."""
+        asyncio.run(self.run_async())
+
+    async def run_async(self) -> None:
+        """
+        Sincroniza las playlists comunes (o la configurada). Las llamadas a
+        TIDAL de ambas cuentas se lanzan en paralelo (hilos) limitadas por un
+        semáforo de `rate_limit` llamadas.
+        """
         if self.playlist_name:
             titles = [self.playlist_name]
             print(f"Sincronizando playlist configurada: '{self.playlist_name}'\n")
         else:
-            titles = self._get_common_playlists()
+            pls_a, pls_b = await asyncio.gather(
+                self._call(self.tidal_a.list_user_playlists),
+                self._call(self.tidal_b.list_user_playlists),
+            )
+            titles = self._common_titles(pls_a, pls_b)
             if not titles:
                 print("No se encontraron playlists con el mismo nombre en ambas cuentas.")
                 return
             print(f"Playlists comunes encontradas: {len(titles)}\n")
 
+        for title in self._confirmed_titles(titles):
+            await self.sync_single_playlist_async(title)
+
+    def _confirmed_titles(self, titles: List[str]) -> List[str]:
+        out: List[str] = []
         for title in sorted(titles):
             print(f"→ Playlist común: '{title}'")
             if self.ask_per_playlist:
@@ -72,21 +96,76 @@ class TidalPlaylistsSynchronizer:
                 )
                 if not ok:
                     continue
+            out.append(title)
+        return out
 
-            self.sync_single_playlist(title)
+    async def _call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Ejecuta una llamada bloqueante a TIDAL en un hilo, respetando el semáforo."""
+        # El semáforo se crea en el primer uso (y de nuevo si cambia el event
+        # loop, p.ej. entre dos run()): vale también llamando directamente
+        # a sync_single_playlist_async
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.rate_limit)
+            self._sem_loop = loop
+        async with self._sem:
+            return await asyncio.to_thread(fn, *args, **kwargs)
 
     def sync_single_playlist(self, playlist_title: str) -> None:
+        """Versión síncrona de `sync_single_playlist_async()`."""
+        asyncio.run(self.sync_single_playlist_async(playlist_title))
+
+    async def sync_single_playlist_async(self, playlist_title: str) -> None:
         print(f"\n==== Sincronizando playlist: '{playlist_title}' ====")
 
-        pl_a = self.tidal_a.get_playlist_by_title(playlist_title)
-        pl_b = self.tidal_b.get_playlist_by_title(playlist_title)
+        pl_a, pl_b = await asyncio.gather(
+            self._call(self.tidal_a.get_playlist_by_title, playlist_title),
+            self._call(self.tidal_b.get_playlist_by_title, playlist_title),
+        )
 
         if pl_a is None or pl_b is None:
             print("  → La playlist no existe en ambas cuentas. No se sincroniza.")
             return
 
-        tracks_a = self.tidal_a.list_playlist_tracks_map(pl_a)
-        tracks_b = self.tidal_b.list_playlist_tracks_map(pl_b)
+        tracks_a, tracks_b = await asyncio.gather(
+            self._call(self.tidal_a.list_playlist_tracks_map, pl_a),
+            self._call(self.tidal_b.list_playlist_tracks_map, pl_b),
+        )
+
+        plan = self._plan_sync(pl_a, pl_b, tracks_a, tracks_b)
+        if plan is None:
+            return
+        to_add_a, to_add_b, playlist_id = plan
+
+        jobs = []
+        if to_add_a:
+            jobs.append(self._call(
+                self.tidal_a.add_tracks_by_ids,
+                pl=pl_a,
+                track_ids=sorted(to_add_a),
+                avoid_duplicates=self.avoid_duplicates,
+            ))
+        if to_add_b:
+            jobs.append(self._call(
+                self.tidal_b.add_tracks_by_ids,
+                pl=pl_b,
+                track_ids=sorted(to_add_b),
+                avoid_duplicates=self.avoid_duplicates,
+            ))
+        await asyncio.gather(*jobs)
+        # DynamoDB (boto3 resource) no es thread-safe: se registra en este hilo
+        self._log_both_sides(playlist_id, to_add_a, to_add_b, tracks_a, tracks_b)
+
+        print("  → Sincronización completada.\n")
+
+    def _plan_sync(
+        self,
+        pl_a: Any,
+        pl_b: Any,
+        tracks_a: Dict[int, Dict[str, str]],
+        tracks_b: Dict[int, Dict[str, str]],
+    ) -> Optional[Tuple[Set[int], Set[int], str]]:
+        """Calcula (to_add_a, to_add_b, playlist_id); None si no hay nada que hacer."""
         ids_a = set(tracks_a.keys())
         ids_b = set(tracks_b.keys())
 
@@ -95,7 +174,7 @@ class TidalPlaylistsSynchronizer:
 
         if not ids_a and not ids_b:
             print("  → Ambas playlists están vacías. Nada que sincronizar.")
-            return
+            return None
 
         union_ids: Set[int] = ids_a | ids_b
         to_add_a = union_ids - ids_a
@@ -106,36 +185,29 @@ class TidalPlaylistsSynchronizer:
         print(f"  Se añadirán a B: {len(to_add_b)}")
 
         playlist_id = str(getattr(pl_a, "id", None) or getattr(pl_b, "id", ""))
-        user_a = self.tidal_a.client.user_name
-        user_b = self.tidal_b.client.user_name
-
-        if to_add_a:
-            self.tidal_a.add_tracks_by_ids(
-                pl=pl_a,
-                track_ids=sorted(to_add_a),
-                avoid_duplicates=self.avoid_duplicates,
-            )
-            self._log_added_tracks(
-                playlist_id=playlist_id,
-                track_ids=to_add_a,
-                source_tracks=tracks_b,
-                inserted_by=user_b,
-            )
-
-        if to_add_b:
-            self.tidal_b.add_tracks_by_ids(
-                pl=pl_b,
-                track_ids=sorted(to_add_b),
-                avoid_duplicates=self.avoid_duplicates,
-            )
-            self._log_added_tracks(
-                playlist_id=playlist_id,
-                track_ids=to_add_b,
-                source_tracks=tracks_a,
-                inserted_by=user_a,
-            )
+        return to_add_a, to_add_b, playlist_id
 
-        print("  → Sincronización completada.\n")
+    def _log_both_sides(
+        self,
+        playlist_id: str,
+        to_add_a: Set[int],
+        to_add_b: Set[int],
+        tracks_a: Dict[int, Dict[str, str]],
+        tracks_b: Dict[int, Dict[str, str]],
+    ) -> None:
+        """Registra lo añadido a A (venía de B) y lo añadido a B (venía de A)."""
+        self._log_added_tracks(
+            playlist_id=playlist_id,
+            track_ids=to_add_a,
+            source_tracks=tracks_b,
+            inserted_by=self.tidal_b.client.user_name,
+        )
+        self._log_added_tracks(
+            playlist_id=playlist_id,
+            track_ids=to_add_b,
+            source_tracks=tracks_a,
+            inserted_by=self.tidal_a.client.user_name,
+        )
 
     def _log_added_tracks(
         self,
@@ -163,10 +235,9 @@ class TidalPlaylistsSynchronizer:
             except Exception as e:
                 print(f"  → Error registrando '{title}' en DynamoDB: {e}")
 
-    def _get_common_playlists(self) -> List[str]:
-        pls_a = self.tidal_a.list_user_playlists()
-        pls_b = self.tidal_b.list_user_playlists()
-
+    def _common_titles(
+        self, pls_a: List[Dict[str, Any]], pls_b: List[Dict[str, Any]]
+    ) -> List[str]:
         map_a = self._build_title_map(pls_a)
         map_b = self._build_title_map(pls_b)
 
@@ -0,0 +1,46 @@
+"""
+Utilidades de concurrencia con hilos.
+
+- iter_map_ordered(fn, items, max_workers): como `ThreadPoolExecutor.map`,
+  pero con una ventana acotada de tareas en vuelo; si el consumidor deja de
+  iterar, las pendientes se cancelan en vez de esperar a que terminen todas.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def iter_map_ordered(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+    window: Optional[int] = None,
+) -> Iterator[R]:
+    """
+    Aplica `fn` a `items` en un pool de `max_workers` hilos y entrega los
+    resultados en el orden de entrada. Como mucho hay `window` tareas
+    lanzadas sin consumir (por defecto 2 * max_workers).
+    """
+    max_workers = max(1, max_workers)
+    window = max(window or 2 * max_workers, 1)
+    it = iter(items)
+    pending: Deque[Future] = deque()
+    ex = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for item in it:
+            pending.append(ex.submit(fn, item))
+            if len(pending) >= window:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for item in it:
+                pending.append(ex.submit(fn, item))
+                break
+            yield result
+    finally:
+        # Si se deja de iterar antes de tiempo, no se espera a lo pendiente
+        ex.shutdown(wait=False, cancel_futures=True)
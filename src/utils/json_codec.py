@@ -0,0 +1,28 @@
+"""
+Codec JSON rápido: usa `orjson` si está instalado y cae a `json` de stdlib si no.
+
+- loads(data): acepta bytes/str
+- dumps(obj, default=None): devuelve bytes UTF-8; `default` serializa tipos
+  no soportados (p.ej. Decimal de DynamoDB), como en `json.dumps`
+"""
+
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+
+    def loads(data: Any) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        # OPT_NON_STR_KEYS: claves int (p.ej. track ids) como hace `json`
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+except ImportError:  # orjson es opcional
+    import json
+
+    def loads(data: Any) -> Any:
+        return json.loads(data)
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return json.dumps(obj, default=default, ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from src.utils.concurrency import iter_map_ordered
+
+
+def test_resultados_en_orden():
+    def slow_square(x):
+        time.sleep(0.01 * (5 - x))
+        return x * x
+
+    assert list(iter_map_ordered(slow_square, range(6), max_workers=3)) == [0, 1, 4, 9, 16, 25]
+
+
+def test_vacio():
+    assert list(iter_map_ordered(lambda x: x, [], max_workers=4)) == []
+
+
+def test_ventana_acota_tareas_lanzadas():
+    started = []
+    lock = threading.Lock()
+
+    def fn(x):
+        with lock:
+            started.append(x)
+        return x
+
+    it = iter_map_ordered(fn, range(100), max_workers=2, window=3)
+    assert next(it) == 0
+    time.sleep(0.05)
+    # Ventana de 3 más la que repone al consumir la primera
+    assert len(started) <= 4
+    it.close()
+
+
+def test_cierre_anticipado_cancela_pendientes():
+    calls = []
+    release = threading.Event()
+
+    def fn(x):
+        calls.append(x)
+        if x > 0:
+            release.wait(1)
+        return x
+
+    it = iter_map_ordered(fn, range(50), max_workers=1, window=10)
+    assert next(it) == 0
+    it.close()
+    release.set()
+    time.sleep(0.05)
+    # Solo llegan a ejecutarse las que ya estaban en marcha
+    assert len(calls) <= 3
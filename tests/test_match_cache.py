@@ -0,0 +1,64 @@
+import asyncio
+
+from src.services.match_cache import MatchCache, match_key
+
+
+def test_match_key_normaliza():
+    assert match_key("  Song  Title ", "The  Band", 5) == ("song title", "the band", 5)
+    assert match_key("Song", None, "3") == ("song", "", 3)
+
+
+def test_match_key_distingue_consultas_distintas():
+    assert match_key("Song [Live]", "X", 5) != match_key("Song", "X", 5)
+    assert match_key("Song", "X", 5) != match_key("Song", "X", 10)
+
+
+def test_roundtrip_en_memoria():
+    cache = MatchCache()
+    key = match_key("song", "artist", 5)
+    assert cache.get(key) is None
+    cache.put(key, (123, 90, {"title": "Song"}))
+    assert cache.get(key) == (123, 90, {"title": "Song"})
+
+
+def test_persistencia_en_sqlite(tmp_path):
+    path = tmp_path / "matches.sqlite"
+    key = match_key("song", "artist", 5)
+    MatchCache(path).put_many([(key, (123, 90, {"title": "Song", "artists": "Artist"}))])
+
+    reopened = MatchCache(path)
+    assert reopened.get(key) == (123, 90, {"title": "Song", "artists": "Artist"})
+
+
+def test_lru_expulsa_la_menos_usada():
+    cache = MatchCache(maxsize=2)
+    a, b, c = (match_key(n, None, 5) for n in "abc")
+    cache.put(a, (1, 90, None))
+    cache.put(b, (2, 90, None))
+    cache.get(a)  # `a` pasa a ser la más reciente
+    cache.put(c, (3, 90, None))
+    assert cache.get(b) is None
+    assert cache.get(a) == (1, 90, None)
+    assert cache.get(c) == (3, 90, None)
+
+
+def test_fallos_no_se_guardan(tmp_path):
+    path = tmp_path / "matches.sqlite"
+    hit, miss = match_key("hit", None, 5), match_key("miss", None, 5)
+    cache = MatchCache(path)
+    cache.put_many([(hit, (1, 90, None)), (miss, (None, 0, None))])
+    assert cache.get(miss) is None
+    assert MatchCache(path).get(miss) is None
+    assert MatchCache(path).get(hit) == (1, 90, None)
+
+
+def test_uso_desde_otro_hilo(tmp_path):
+    # La migración no interactiva resuelve las pistas dentro de asyncio.to_thread
+    path = tmp_path / "matches.sqlite"
+    cache = MatchCache(path)
+    key = match_key("song", "artist", 5)
+
+    asyncio.run(asyncio.to_thread(cache.put, key, (123, 90, None)))
+
+    assert asyncio.run(asyncio.to_thread(cache.get, key)) == (123, 90, None)
+    assert MatchCache(path).get(key) == (123, 90, None)
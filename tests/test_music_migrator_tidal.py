@@ -0,0 +1,126 @@
+import asyncio
+
+from src.services.match_cache import MatchCache, match_key
+from src.services.music_migrator_tidal import SpotifyToTidalMigrator, _sniff_image_ext
+
+
+def test_sniff_image_ext():
+    assert _sniff_image_ext(b"\x89PNG\r\n\x1a\n") == "png"
+    assert _sniff_image_ext(b"\xff\xd8\xff\xe0") == "jpg"
+    assert _sniff_image_ext(b"GIF89a") == "gif"
+    assert _sniff_image_ext(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "webp"
+    assert _sniff_image_ext(b"") == "jpg"
+    assert _sniff_image_ext(b"desconocido") == "jpg"
+
+
+class _FakeTidal:
+    def __init__(self):
+        self.queries = []
+        self._ids = {}
+
+    def iter_best_matches(self, queries, limit, max_workers):
+        self.queries.append(list(queries))
+        for name, artist in queries:
+            tid = None if name == "missing" else self._ids.setdefault(name, len(self._ids) + 1)
+            yield (tid, 90 if tid else 0, {"title": name, "artists": artist} if tid else None)
+
+
+def _migrator(cache):
+    migrator = SpotifyToTidalMigrator.__new__(SpotifyToTidalMigrator)
+    migrator.tidal = _FakeTidal()
+    migrator._match_cache = cache
+    migrator.per_query_limit = 5
+    migrator.max_concurrency = 2
+    return migrator
+
+
+def _track(name, artist="Artist"):
+    return {"name": name, "artists": [{"name": artist}]}
+
+
+def test_iter_plan_usa_cache_y_no_guarda_fallos():
+    cache = MatchCache()
+    cache.put(match_key("A", "Artist", 5), (7, 95, {"title": "A", "artists": "Artist"}))
+    migrator = _migrator(cache)
+
+    plan = list(migrator._iter_plan([_track("A"), _track("missing"), _track("B")]))
+
+    assert migrator.tidal.queries == [[("missing", "Artist"), ("B", "Artist")]]
+    assert [(p.tidal_id, p.score) for p in plan][:2] == [(7, 95), (None, 0)]
+    assert cache.get(match_key("missing", "Artist", 5)) is None
+    assert cache.get(match_key("B", "Artist", 5)) is not None
+
+
+def test_iter_plan_guarda_lo_resuelto_aunque_se_corte():
+    cache = MatchCache()
+    migrator = _migrator(cache)
+
+    plan = migrator._iter_plan([_track("A"), _track("B"), _track("C")])
+    next(plan)
+    plan.close()
+
+    assert cache.get(match_key("A", "Artist", 5)) is not None
+
+
+def test_iter_plan_resuelve_duplicados_una_vez_y_expande():
+    migrator = _migrator(MatchCache())
+    tracks = [_track("A"), _track("B"), _track("a (Remastered)"), _track("A")]
+
+    plan = list(migrator._iter_plan(tracks))
+
+    assert migrator.tidal.queries == [[("A", "Artist"), ("B", "Artist")]]
+    assert [p.track for p in plan] == ["A", "B", "a", "A"]
+    assert plan[0].tidal_id == plan[2].tidal_id == plan[3].tidal_id
+    assert plan[1].tidal_id != plan[0].tidal_id
+
+
+def test_iter_plan_no_mezcla_consultas_distintas():
+    migrator = _migrator(MatchCache())
+
+    plan = list(migrator._iter_plan([_track("Song"), _track("Song [Live]")]))
+
+    assert migrator.tidal.queries == [[("Song", "Artist"), ("Song [Live]", "Artist")]]
+    assert plan[0].tidal_id != plan[1].tidal_id
+
+
+class _FakeSpotify:
+    def __init__(self, names, events):
+        self.names = names
+        self.events = events
+
+    async def iter_playlists_with_tracks(self, *, max_concurrency, skip):
+        async def _tracks(name):
+            self.events.append(("fetch", name))
+            if name == "roto":
+                raise RuntimeError("boom")
+            return [_track(name)]
+
+        for name in self.names:
+            self.events.append(("listed", name))
+            row = {"id": name, "name": name}
+            yield row, None if skip(row) else asyncio.ensure_future(_tracks(name))
+
+
+class _FakeTidalTitles:
+    def list_playlist_titles(self):
+        return {"existente"}
+
+
+def test_migrate_all_migra_mientras_lista():
+    events = []
+    migrator = SpotifyToTidalMigrator.__new__(SpotifyToTidalMigrator)
+    migrator.spot = _FakeSpotify(["p0", "existente", "roto", "p3", "p4", "p5"], events)
+    migrator.tidal = _FakeTidalTitles()
+    migrator.max_concurrency = 2
+    migrator.migrate_playlist = lambda **kw: events.append(("migrate", kw["playlist_name"]))
+
+    asyncio.run(migrator._migrate_all())
+
+    migrated = [name for kind, name in events if kind == "migrate"]
+    assert migrated == ["p0", "p3", "p4", "p5"]
+    assert ("fetch", "existente") not in events
+    # La primera playlist se migra antes de terminar el listado, con como
+    # mucho max_concurrency playlists listadas por delante
+    first = events.index(("migrate", "p0"))
+    assert events.index(("listed", "p5")) > first
+    assert [name for kind, name in events[:first] if kind == "listed"] == ["p0", "existente", "roto"]
@@ -0,0 +1,29 @@
+from src.services.playlist_cache import PlaylistTracksCache
+
+TRACKS = [{"id": "t1", "name": "Song", "artists": [{"id": "a1", "name": "Artist"}]}]
+
+
+def test_roundtrip_mismo_snapshot(tmp_path):
+    cache = PlaylistTracksCache(tmp_path / "pl.sqlite")
+    cache.put("pl1", "snap1", TRACKS)
+    assert cache.get("pl1", "snap1") == TRACKS
+    assert PlaylistTracksCache(tmp_path / "pl.sqlite").get("pl1", "snap1") == TRACKS
+
+
+def test_snapshot_distinto_invalida(tmp_path):
+    cache = PlaylistTracksCache(tmp_path / "pl.sqlite")
+    cache.put("pl1", "snap1", TRACKS)
+    assert cache.get("pl1", "snap2") is None
+    assert cache.get("otra", "snap1") is None
+
+    # Un snapshot nuevo sustituye al anterior
+    cache.put("pl1", "snap2", [])
+    assert cache.get("pl1", "snap2") == []
+    assert cache.get("pl1", "snap1") is None
+
+
+def test_sin_snapshot_no_se_cachea(tmp_path):
+    cache = PlaylistTracksCache(tmp_path / "pl.sqlite")
+    cache.put("pl1", None, TRACKS)
+    assert cache.get("pl1", None) is None
+    assert cache.get("pl1", "") is None
@@ -0,0 +1,87 @@
+import threading
+
+from src.services import spotify_getter
+from src.services.spotify_getter import SpotifyUserClient
+
+
+def _client(path="/callback"):
+    client = SpotifyUserClient.__new__(SpotifyUserClient)
+    client._callback_path = path
+    return client
+
+
+def test_callback_con_code():
+    code, response = _client()._handle_callback_request(
+        b"GET /callback?code=abc123&state=xyz HTTP/1.1\r\nHost: localhost\r\n\r\n"
+    )
+    assert code == "abc123"
+    assert response.startswith(b"HTTP/1.1 200")
+
+
+def test_callback_sin_code():
+    code, response = _client()._handle_callback_request(b"GET /callback?error=access_denied HTTP/1.1\r\n\r\n")
+    assert code is None
+    assert response.startswith(b"HTTP/1.1 400")
+
+
+def test_callback_otra_ruta_o_metodo():
+    client = _client()
+    for raw in (b"GET /favicon.ico HTTP/1.1\r\n\r\n", b"POST /callback?code=abc HTTP/1.1\r\n\r\n", b""):
+        code, response = client._handle_callback_request(raw)
+        assert code is None
+        assert response.startswith(b"HTTP/1.1 404")
+
+
+class _Resp:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class _FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def request(self, **kwargs):
+        self.calls += 1
+        return _Resp(self.statuses.pop(0), {"Retry-After": "2"})
+
+
+def test_adaptador_no_reintenta_429():
+    client = SpotifyUserClient(client_id="x", redirect_uri="http://127.0.0.1:8888/callback")
+    retry = client._session.get_adapter("https://api.spotify.com").max_retries
+    assert 429 not in retry.status_forcelist
+
+
+def test_send_reintenta_429_fuera_del_semaforo(monkeypatch):
+    client = _client()
+    client._session = _FakeSession([429, 429, 200])
+    client._rate_limiter = threading.BoundedSemaphore(1)
+    sleeps = []
+
+    def fake_sleep(secs):
+        # Mientras se espera el Retry-After el hueco queda libre
+        assert client._rate_limiter.acquire(blocking=False)
+        client._rate_limiter.release()
+        sleeps.append(secs)
+
+    monkeypatch.setattr(spotify_getter.time, "sleep", fake_sleep)
+
+    resp = client._send("GET", "https://api.spotify.com/v1/me", None, None)
+
+    assert resp.status_code == 200
+    assert client._session.calls == 3
+    assert sleeps == [2.0, 2.0]
+
+
+def test_send_devuelve_el_ultimo_429(monkeypatch):
+    client = _client()
+    client._session = _FakeSession([429] * (SpotifyUserClient.MAX_429_RETRIES + 1))
+    client._rate_limiter = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(spotify_getter.time, "sleep", lambda secs: None)
+
+    resp = client._send("GET", "https://api.spotify.com/v1/me", None, None)
+
+    assert resp.status_code == 429
+    assert client._session.calls == SpotifyUserClient.MAX_429_RETRIES + 1
@@ -0,0 +1,234 @@
+import urllib.parse
+
+from src.services.spotify_library import SpotifyLibrary, _clamp_limit, _track_row
+
+BASE = "https://api.spotify.com/v1"
+
+
+def _item(i):
+    return {
+        "added_at": f"2024-01-{i % 28 + 1:02d}T00:00:00Z",
+        "added_by": {"id": "u1"},
+        "track": {
+            "id": f"t{i}",
+            "name": f"Song {i}",
+            "duration_ms": 1000,
+            "is_local": False,
+            "album": {"id": "al1", "name": "Album"},
+            "artists": [{"id": "a1", "name": "Artist"}],
+        },
+    }
+
+
+class _FakeClient:
+    """Simula /playlists/{id} y /playlists/{id}/tracks (páginas de 100)."""
+
+    def __init__(self, total, snapshot_id="snap1"):
+        self.total = total
+        self.snapshot_id = snapshot_id
+        self.calls = []
+
+    def _page(self, offset, limit):
+        items = [_item(i) for i in range(offset, min(offset + limit, self.total))]
+        nxt = f"{BASE}/playlists/p1/tracks?offset={offset + limit}" if offset + limit < self.total else None
+        return {"items": items, "next": nxt, "total": self.total, "limit": limit}
+
+    def api_request(self, method, endpoint, params=None):
+        self.calls.append(endpoint)
+        if endpoint.startswith("http"):
+            qs = urllib.parse.parse_qs(urllib.parse.urlparse(endpoint).query)
+            return self._page(int(qs["offset"][0]), int(qs["limit"][0]))
+        if endpoint == "/playlists/p1":
+            return {"snapshot_id": self.snapshot_id, "tracks": self._page(0, 100)}
+        return self._page(int((params or {}).get("offset", 0)), int(params["limit"]))
+
+
+def _lib(tmp_path, client):
+    return SpotifyLibrary(client, tracks_cache_path=tmp_path / "pl.sqlite")
+
+
+def test_playlist_tracks_sin_snapshot_continua_desde_la_primera_pagina(tmp_path):
+    client = _FakeClient(total=250)
+
+    tracks = _lib(tmp_path, client).get_playlist_tracks("p1")
+
+    assert [t["id"] for t in tracks] == [f"t{i}" for i in range(250)]
+    # La primera página llega con el objeto playlist: no se pide dos veces
+    assert client.calls[0] == "/playlists/p1"
+    assert len(client.calls) == 3
+    assert "/playlists/p1/tracks" not in client.calls
+
+
+def test_playlist_tracks_cache_por_snapshot(tmp_path):
+    client = _FakeClient(total=150)
+    lib = _lib(tmp_path, client)
+    first = lib.get_playlist_tracks("p1")
+    client.calls.clear()
+
+    # snapshot conocido (del listado): ninguna petición
+    assert lib.get_playlist_tracks("p1", snapshot_id="snap1") == first
+    assert client.calls == []
+
+    # snapshot desconocido: una sola petición para validarlo
+    assert lib.get_playlist_tracks("p1") == first
+    assert client.calls == ["/playlists/p1"]
+
+
+def test_playlist_tracks_snapshot_nuevo_o_force_refresh_paginan(tmp_path):
+    client = _FakeClient(total=150)
+    lib = _lib(tmp_path, client)
+    lib.get_playlist_tracks("p1")
+
+    client.total, client.snapshot_id = 120, "snap2"
+    client.calls.clear()
+    assert len(lib.get_playlist_tracks("p1")) == 120
+    assert len(client.calls) == 2
+
+    client.calls.clear()
+    assert len(lib.get_playlist_tracks("p1", snapshot_id="snap2", force_refresh=True)) == 120
+    assert client.calls[0] == "/playlists/p1/tracks"
+
+
+def test_playlist_tracks_con_max_total_no_usa_cache(tmp_path):
+    client = _FakeClient(total=150)
+    lib = _lib(tmp_path, client)
+
+    assert len(lib.get_playlist_tracks("p1", max_total=10)) == 10
+    assert client.calls == ["/playlists/p1/tracks"]
+
+
+class _FakeSavedClient:
+    """Simula /me/tracks (de más reciente a más antigua, páginas de 50)."""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self.calls = []
+
+    def api_request(self, method, endpoint, params=None):
+        self.calls.append(endpoint)
+        if endpoint.startswith("http"):
+            qs = urllib.parse.parse_qs(urllib.parse.urlparse(endpoint).query)
+            offset, limit = int(qs["offset"][0]), int(qs["limit"][0])
+        else:
+            offset, limit = int(params.get("offset", 0)), int(params["limit"])
+        items = [_item(i) for i in self.ids[offset:offset + limit]]
+        nxt = "more" if offset + limit < len(self.ids) else None
+        return {"items": items, "next": nxt, "total": len(self.ids), "limit": limit}
+
+
+def test_saved_tracks_cache_validada_por_la_primera_pagina(tmp_path):
+    client = _FakeSavedClient(range(120, 0, -1))
+    lib = _lib(tmp_path, client)
+
+    tracks = lib.get_my_saved_tracks()
+    assert [t["id"] for t in tracks] == [f"t{i}" for i in range(1, 121)]
+    assert len(client.calls) == 3
+
+    # Sin cambios: solo la primera página
+    client.calls.clear()
+    assert lib.get_my_saved_tracks() == tracks
+    assert len(client.calls) == 1
+
+    # Una canción nueva cambia la primera página: se vuelve a paginar
+    client.ids.insert(0, 500)
+    client.calls.clear()
+    assert lib.get_my_saved_tracks()[-1]["id"] == "t500"
+    assert len(client.calls) == 3
+
+
+def test_saved_tracks_force_refresh(tmp_path):
+    client = _FakeSavedClient(range(60, 0, -1))
+    lib = _lib(tmp_path, client)
+    lib.get_my_saved_tracks()
+
+    client.calls.clear()
+    assert len(lib.get_my_saved_tracks(force_refresh=True)) == 60
+    assert len(client.calls) == 2
+
+
+def test_track_row_camino_rapido():
+    item = {
+        "added_at": "2024-01-01T00:00:00Z",
+        "added_by": {"id": "u1"},
+        "track": {
+            "id": "t1",
+            "name": "Song",
+            "duration_ms": 1000,
+            "is_local": False,
+            "album": {"id": "al1", "name": "Album"},
+            "artists": [{"id": "a1", "name": "Artist"}],
+        },
+    }
+    assert _track_row(item) == {
+        "id": "t1",
+        "name": "Song",
+        "duration_ms": 1000,
+        "is_local": False,
+        "added_at": "2024-01-01T00:00:00Z",
+        "added_by": "u1",
+        "album": {"id": "al1", "name": "Album"},
+        "artists": [{"id": "a1", "name": "Artist"}],
+    }
+
+
+def test_track_row_camino_seguro_con_claves_ausentes():
+    item = {"track": {"id": "t1", "name": "Song", "album": None, "artists": [{"name": "Artist"}]}}
+    assert _track_row(item) == {
+        "id": "t1",
+        "name": "Song",
+        "duration_ms": None,
+        "is_local": None,
+        "added_at": None,
+        "added_by": None,
+        "album": {"id": None, "name": None},
+        "artists": [{"id": None, "name": "Artist"}],
+    }
+
+
+def test_track_row_sin_pista():
+    assert _track_row({"track": None}) is None
+    assert _track_row({}) is None
+
+
+def test_clamp_limit():
+    assert _clamp_limit(50, 50) == 50
+    assert _clamp_limit(200, 50) == 50
+    assert _clamp_limit(20, 50) == 20
+    assert _clamp_limit(0, 50) == 1
+    assert _clamp_limit(-3, 50) == 1
+
+
+def _offsets(urls):
+    out = []
+    for url in urls:
+        qs = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        out.append((int(qs["offset"][0]), int(qs["limit"][0])))
+    return out
+
+
+def test_first_page_params():
+    params = {"limit": 50, "fields": "x"}
+    assert SpotifyLibrary._first_page_params(params, None) == params
+    assert SpotifyLibrary._first_page_params(params, 120) == params
+    assert SpotifyLibrary._first_page_params(params, 10) == {"limit": 10, "fields": "x"}
+    assert SpotifyLibrary._first_page_params(None, 10) == {}
+    # No modifica el dict original
+    assert params["limit"] == 50
+
+
+def test_page_urls_offsets_y_ultima_pagina():
+    urls = SpotifyLibrary._page_urls("/me/tracks", {"limit": 50, "offset": 0}, 50, 230)
+    assert _offsets(urls) == [(50, 50), (100, 50), (150, 50), (200, 30)]
+    assert all(u.startswith(f"{BASE}/me/tracks?") for u in urls)
+
+
+def test_page_urls_conserva_query_comun():
+    urls = SpotifyLibrary._page_urls("playlists/p1/tracks", {"limit": 100, "fields": "a,b"}, 100, 250)
+    assert _offsets(urls) == [(100, 100), (200, 50)]
+    qs = urllib.parse.parse_qs(urllib.parse.urlparse(urls[0]).query)
+    assert qs["fields"] == ["a,b"]
+
+
+def test_page_urls_una_sola_pagina():
+    assert SpotifyLibrary._page_urls("me/tracks", {"limit": 50}, 50, 50) == []
+    assert SpotifyLibrary._page_urls("me/tracks", {"limit": 50}, 50, 0) == []
@@ -0,0 +1,19 @@
+from src.services.tidal_client import _as_int, _normalize_track_ids
+
+
+def test_as_int():
+    assert _as_int(5) == 5
+    assert _as_int(" 42 ") == 42
+    assert _as_int("abc") is None
+    assert _as_int("-1") is None
+    assert _as_int(None) is None
+    assert _as_int(1.5) is None
+
+
+def test_normalize_track_ids_dedup_en_orden():
+    assert _normalize_track_ids([3, "1", 3, " 2", "x", None, 1]) == [3, 1, 2]
+
+
+def test_normalize_track_ids_vacio():
+    assert _normalize_track_ids(None) == []
+    assert _normalize_track_ids([]) == []